@@ -8,16 +8,20 @@ LangChain documentation with conversational memory.
 import os
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_classic import hub
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
 from langchain_classic.chains.retrieval import create_retrieval_chain
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_cohere import CohereEmbeddings
-from langchain_pinecone import PineconeVectorStore
+
+from prompts import get_retrieval_qa_chat_prompt
+from vectorstore import get_vectorstore
 
 load_dotenv()
 
+# Conversation turns (user + assistant pairs) sent to the LLM as history,
+# matching ConversationMemoryManager(max_history=5) in the CLI
+MAX_HISTORY_TURNS = 5
+
 # Page configuration
 st.set_page_config(
     page_title="LangChain Documentation Helper",
@@ -60,20 +64,16 @@ st.markdown("""
 @st.cache_resource
 def initialize_system():
     """Initialize the RAG system components (cached for performance)."""
-    embeddings = CohereEmbeddings(model="embed-english-v3.0")
     llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
     
     index_name = os.getenv("INDEX_NAME")
     if not index_name:
         raise ValueError("INDEX_NAME not found in .env file")
     
-    vectorstore = PineconeVectorStore(
-        index_name=index_name,
-        embedding=embeddings
-    )
+    vectorstore = get_vectorstore(index_name)
     
     # Create retrieval chain
-    retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
+    retrieval_qa_chat_prompt = get_retrieval_qa_chat_prompt()
     combine_docs_chain = create_stuff_documents_chain(llm, retrieval_qa_chat_prompt)
     retrieval_chain = create_retrieval_chain(
         retriever=vectorstore.as_retriever(search_kwargs={"k": 4}),
@@ -83,28 +83,47 @@ def initialize_system():
     return retrieval_chain
 
 
+def stream_answer(retrieval_chain, inputs: dict, result: dict):
+    """
+    Stream answer tokens from the retrieval chain as they are generated.
+    
+    Args:
+        retrieval_chain: Retrieval chain to query
+        inputs: Chain inputs ("input" and "chat_history")
+        result: Dict that receives the retrieved "context" documents
+        
+    Yields:
+        Answer text chunks
+    """
+    for chunk in retrieval_chain.stream(inputs):
+        if "context" in chunk:
+            result["context"] = chunk["context"]
+        if "answer" in chunk:
+            yield chunk["answer"]
+
+
 def format_sources(context):
     """Format source documents for display."""
     if not context:
         return None
     
-    sources = []
-    seen_urls = set()
-    
+    # Deduplicate by source in one pass; the first (top-ranked) chunk per
+    # source wins and sources keep their first-seen order
+    unique_docs = {}
     for doc in context:
-        source = doc.metadata.get("source", "Unknown")
+        unique_docs.setdefault(doc.metadata.get("source", "Unknown"), doc)
+    
+    sources = []
+    for source, doc in unique_docs.items():
         title = doc.metadata.get("title", "")
         doc_type = doc.metadata.get("type", "local")
         
-        # Avoid duplicates
-        if source not in seen_urls:
-            seen_urls.add(source)
-            sources.append({
-                "title": title if title else source,
-                "url": source,
-                "type": doc_type,
-                "preview": doc.page_content[:200] + "..."
-            })
+        sources.append({
+            "title": title if title else source,
+            "url": source,
+            "type": doc_type,
+            "preview": doc.page_content[:200] + "..."
+        })
     
     return sources
 
@@ -148,6 +167,7 @@ def main():
         
         if st.button("🧹 Clear Conversation", use_container_width=True):
             st.session_state.messages = []
+            st.session_state.chat_history = []
             st.rerun()
         
         st.divider()
@@ -157,6 +177,11 @@ def main():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
+    # Chat history for the chain, kept as message objects so it is
+    # extended once per turn instead of rebuilt on every rerun
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = []
+    
     # Initialize the system
     try:
         with st.spinner("🔄 Initializing system..."):
@@ -202,25 +227,21 @@ def main():
         with st.chat_message("assistant"):
             with st.spinner("🤔 Thinking..."):
                 try:
-                    # Build chat history as list of message objects
-                    chat_history = []
-                    for msg in st.session_state.messages[:-1]:  # Exclude current message
-                        if msg["role"] == "user":
-                            chat_history.append(HumanMessage(content=msg["content"]))
-                        else:
-                            chat_history.append(AIMessage(content=msg["content"]))
-                    
-                    # Query the system
-                    result = retrieval_chain.invoke({
-                        "input": user_input,
-                        "chat_history": chat_history
-                    })
-                    
-                    answer = result.get("answer", "I couldn't find an answer to that question.")
+                    # Query the system, displaying the answer as it streams in
+                    result = {}
+                    answer = st.write_stream(stream_answer(
+                        retrieval_chain,
+                        {
+                            "input": user_input,
+                            "chat_history": st.session_state.chat_history
+                        },
+                        result
+                    ))
                     context = result.get("context", [])
                     
-                    # Display answer
-                    st.markdown(answer)
+                    if not answer:
+                        answer = "I couldn't find an answer to that question."
+                        st.markdown(answer)
                     
                     # Format and display sources
                     sources = format_sources(context)
@@ -242,6 +263,12 @@ def main():
                         "content": answer,
                         "sources": sources if sources else []
                     })
+                    st.session_state.chat_history.extend([
+                        HumanMessage(content=user_input),
+                        AIMessage(content=answer)
+                    ])
+                    # Keep only the most recent turns so prompt size stays bounded
+                    del st.session_state.chat_history[:-2 * MAX_HISTORY_TURNS]
                     
                 except Exception as e:
                     error_msg = f"❌ Error: {str(e)}"
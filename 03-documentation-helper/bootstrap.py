@@ -0,0 +1,29 @@
+"""
+One-time System Initialization for the CLI
+
+This module builds the LLM, vector store, and answer chain at import
+time, so they are created exactly once per process and shared by
+everything that imports them.
+"""
+
+import os
+from dotenv import load_dotenv
+from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from prompts import get_retrieval_qa_chat_prompt
+from vectorstore import get_vectorstore
+
+load_dotenv()
+
+INDEX_NAME = os.getenv("INDEX_NAME")
+if not INDEX_NAME:
+    raise ValueError("INDEX_NAME not found in .env file")
+
+LLM = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
+
+VECTORSTORE = get_vectorstore(INDEX_NAME)
+
+# Answers from retrieved documents and history; retrieval itself runs
+# separately so it can overlap with per-turn setup (see main.start_retrieval)
+ANSWER_CHAIN = create_stuff_documents_chain(LLM, get_retrieval_qa_chat_prompt())
@@ -6,6 +6,7 @@ LangChain documentation websites. It handles URL fetching, content extraction,
 and preprocessing for the RAG pipeline.
 """
 
+import asyncio
 import os
 from typing import List, Dict, Any
 from dotenv import load_dotenv
@@ -13,6 +14,9 @@ from tavily import TavilyClient
 
 load_dotenv()
 
+# Maximum number of URLs Tavily accepts in a single extract request
+EXTRACT_BATCH_SIZE = 20
+
 
 class LangChainDocCrawler:
     """Crawls LangChain documentation using Tavily API."""
@@ -27,7 +31,7 @@ class LangChainDocCrawler:
             )
         self.client = TavilyClient(api_key=api_key)
     
-    def search_langchain_docs(
+    async def search_langchain_docs(
         self, 
         query: str = "LangChain documentation", 
         max_results: int = 5
@@ -45,8 +49,11 @@ class LangChainDocCrawler:
         print(f"🔍 Searching for: {query}")
         
         try:
-            # Search with Tavily - focuses on LangChain official docs
-            response = self.client.search(
+            # Search with Tavily - focuses on LangChain official docs.
+            # TavilyClient is synchronous, so run it in a worker thread
+            # to let several searches overlap.
+            response = await asyncio.to_thread(
+                self.client.search,
                 query=query,
                 search_depth="advanced",  # More thorough search
                 max_results=max_results,
@@ -71,10 +78,13 @@ class LangChainDocCrawler:
             print(f"❌ Error during search: {e}")
             return []
     
-    def crawl_specific_urls(self, urls: List[str]) -> List[Dict[str, Any]]:
+    async def crawl_specific_urls(self, urls: List[str]) -> List[Dict[str, Any]]:
         """
         Crawl specific URLs directly.
         
+        URLs are sent to Tavily's extract endpoint in batches (it accepts a
+        list), and the batches are extracted concurrently.
+        
         Args:
             urls: List of URLs to crawl
             
@@ -83,32 +93,48 @@ class LangChainDocCrawler:
         """
         print(f"🌐 Crawling {len(urls)} specific URLs...")
         
-        documents = []
-        for url in urls:
-            try:
-                # Extract content from URL
-                response = self.client.extract(urls=[url])
-                
-                for result in response.get("results", []):
-                    doc = {
-                        "url": result.get("url", url),
-                        "title": result.get("title", "Untitled"),
-                        "content": result.get("raw_content", ""),
-                    }
-                    documents.append(doc)
-                    print(f"  ✅ Crawled: {url}")
-                    
-            except Exception as e:
-                print(f"  ❌ Failed to crawl {url}: {e}")
-                continue
+        batches = [
+            urls[i:i + EXTRACT_BATCH_SIZE]
+            for i in range(0, len(urls), EXTRACT_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*[self._extract_batch(batch) for batch in batches])
+        documents = [doc for docs in results for doc in docs]
         
         print(f"📚 Successfully crawled {len(documents)} URLs\n")
         return documents
     
-    def get_langchain_basics(self) -> List[Dict[str, Any]]:
+    async def _extract_batch(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """Extract content from a batch of URLs with a single API call."""
+        try:
+            # Extract content from all URLs in one request
+            response = await asyncio.to_thread(self.client.extract, urls=urls)
+        except Exception as e:
+            for url in urls:
+                print(f"  ❌ Failed to crawl {url}: {e}")
+            return []
+        
+        documents = []
+        for result in response.get("results", []):
+            doc = {
+                "url": result.get("url", ""),
+                "title": result.get("title", "Untitled"),
+                "content": result.get("raw_content", ""),
+            }
+            documents.append(doc)
+            print(f"  ✅ Crawled: {doc['url']}")
+        
+        # Tavily reports per-URL failures separately instead of raising
+        for failed in response.get("failed_results", []):
+            print(f"  ❌ Failed to crawl {failed.get('url')}: {failed.get('error')}")
+        
+        return documents
+    
+    async def get_langchain_basics(self) -> List[Dict[str, Any]]:
         """
         Get essential LangChain documentation covering core concepts.
         
+        The queries are independent, so they are issued concurrently.
+        
         Returns:
             List of documents about LangChain basics
         """
@@ -120,10 +146,10 @@ class LangChainDocCrawler:
             "LangChain memory and conversation",
         ]
         
-        all_documents = []
-        for query in queries:
-            docs = self.search_langchain_docs(query, max_results=3)
-            all_documents.extend(docs)
+        results = await asyncio.gather(
+            *[self.search_langchain_docs(query, max_results=3) for query in queries]
+        )
+        all_documents = [doc for docs in results for doc in docs]
         
         # Remove duplicates based on URL
         seen_urls = set()
@@ -136,7 +162,7 @@ class LangChainDocCrawler:
         return unique_docs
 
 
-def main():
+async def main():
     """Demo: Crawl LangChain documentation."""
     print("=" * 60)
     print("LangChain Documentation Crawler Demo")
@@ -147,7 +173,7 @@ def main():
     # Method 1: Search-based crawling
     print("Method 1: Search-based crawling")
     print("-" * 60)
-    documents = crawler.search_langchain_docs(
+    documents = await crawler.search_langchain_docs(
         query="LangChain RAG retrieval tutorial",
         max_results=3
     )
@@ -164,7 +190,7 @@ def main():
     print("Method 2: Get LangChain basics (multiple queries)")
     print("=" * 60 + "\n")
     
-    basics_docs = crawler.get_langchain_basics()
+    basics_docs = await crawler.get_langchain_basics()
     print(f"\n✅ Total unique documents retrieved: {len(basics_docs)}")
     
     # Show summary
@@ -174,4 +200,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
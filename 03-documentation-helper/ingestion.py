@@ -5,8 +5,14 @@ This module processes both local files and web-crawled content, creating
 embeddings and storing them in Pinecone with metadata for source attribution.
 """
 
+import asyncio
+import functools
+import hashlib
+import itertools
+import multiprocessing
 import os
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
 from dotenv import load_dotenv
 from langchain_community.document_loaders import TextLoader
 from langchain_cohere import CohereEmbeddings
@@ -14,10 +20,42 @@ from langchain_pinecone import PineconeVectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+from pinecone import ServerlessSpec
+
 from crawler import LangChainDocCrawler
+from vectorstore import (
+    EMBEDDING_NAMESPACE,
+    NAMESPACE_PREFIX,
+    get_embeddings,
+    get_index,
+    get_pinecone_client,
+)
 
 load_dotenv()
 
+# Cohere accepts at most 96 texts per embed request
+EMBED_BATCH_SIZE = 96
+
+# Embed requests in flight at once; together with EMBED_BATCH_SIZE this sets
+# how many chunks are held in memory at a time while streaming
+EMBED_CONCURRENCY = 4
+STREAM_WINDOW_SIZE = EMBED_BATCH_SIZE * EMBED_CONCURRENCY
+
+# Number of vectors sent to Pinecone per upsert request
+UPSERT_BATCH_SIZE = 100
+
+# Maximum number of IDs Pinecone accepts in a single fetch request
+FETCH_BATCH_SIZE = 1000
+
+# Worker threads the Pinecone client uses for concurrent upserts
+UPSERT_POOL_THREADS = 30
+
+# Below this many documents, splitting in-process beats process pool overhead
+PARALLEL_SPLIT_THRESHOLD = 8
+
+# Cohere embed-english-v3.0 vector size
+EMBEDDING_DIMENSION = 1024
+
 
 def load_local_documents(file_path: str) -> List[Document]:
     """
@@ -45,48 +83,85 @@ def load_local_documents(file_path: str) -> List[Document]:
         return []
 
 
-def load_web_documents() -> List[Document]:
+def load_web_documents() -> Iterator[Document]:
     """
     Load documents from web using Tavily crawler.
     
-    Returns:
-        List of Document objects from web sources
+    Documents are yielded one at a time so downstream stages can start
+    before the whole crawl has been converted.
+    
+    Yields:
+        Document objects from web sources
     """
     print("🌐 Crawling LangChain documentation from web...")
     
     try:
         crawler = LangChainDocCrawler()
-        web_docs = crawler.get_langchain_basics()
-        
-        # Convert to LangChain Document format with metadata
-        documents = []
-        for doc in web_docs:
-            if doc["content"].strip():  # Only add non-empty content
-                documents.append(
-                    Document(
-                        page_content=doc["content"],
-                        metadata={
-                            "source": doc["url"],
-                            "title": doc["title"],
-                            "type": "web",
-                        }
-                    )
-                )
-        
-        print(f"✅ Loaded {len(documents)} web document(s)\n")
-        return documents
-        
+        web_docs = asyncio.run(crawler.get_langchain_basics())
     except Exception as e:
         print(f"⚠️  Web crawling failed: {e}")
         print("Continuing with local documents only...\n")
-        return []
+        return
+    
+    # Convert to LangChain Document format with metadata
+    count = 0
+    for doc in web_docs:
+        if doc["content"].strip():  # Only add non-empty content
+            count += 1
+            yield Document(
+                page_content=doc["content"],
+                metadata={
+                    "source": doc["url"],
+                    "title": doc["title"],
+                    "type": "web",
+                }
+            )
+    
+    print(f"✅ Loaded {count} web document(s)\n")
 
 
-def split_documents(
-    documents: List[Document],
+@functools.lru_cache(maxsize=None)
+def get_text_splitter(
     chunk_size: int = 1000,
     chunk_overlap: int = 200
+) -> RecursiveCharacterTextSplitter:
+    """
+    Get a shared RecursiveCharacterTextSplitter for the given settings.
+    
+    Args:
+        chunk_size: Maximum size of each chunk
+        chunk_overlap: Number of characters to overlap between chunks
+        
+    Returns:
+        Cached text splitter instance
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""],  # Try these in order
+    )
+
+
+def _split_batch(
+    documents: List[Document],
+    chunk_size: int,
+    chunk_overlap: int
 ) -> List[Document]:
+    """Split one shard of documents (runs inside a worker process)."""
+    return get_text_splitter(chunk_size, chunk_overlap).split_documents(documents)
+
+
+def _take(iterator: Iterator, n: int) -> list:
+    """Pull up to n items from an iterator."""
+    return list(itertools.islice(iterator, n))
+
+
+def split_documents(
+    documents: Iterable[Document],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200
+) -> Iterator[Document]:
     """
     Split documents into chunks using RecursiveCharacterTextSplitter.
     
@@ -95,56 +170,276 @@ def split_documents(
     - Falls back to sentence boundaries
     - Preserves semantic coherence better
     
+    Chunks are yielded as they are produced. Splitting is CPU-bound, so
+    larger inputs are split a window of documents at a time across a
+    process pool, one document per task.
+    
     Args:
-        documents: List of documents to split
+        documents: Documents to split
         chunk_size: Maximum size of each chunk
         chunk_overlap: Number of characters to overlap between chunks
         
-    Returns:
-        List of chunked documents with preserved metadata
+    Yields:
+        Chunked documents with preserved metadata
     """
     print(f"✂️  Splitting documents (chunk_size={chunk_size}, overlap={chunk_overlap})...")
     
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""],  # Try these in order
+    documents = iter(documents)
+    workers = os.cpu_count() or 1
+    window = _take(documents, PARALLEL_SPLIT_THRESHOLD + 1)
+    
+    if len(window) <= PARALLEL_SPLIT_THRESHOLD or workers == 1:
+        # Small input: not worth starting a process pool
+        for doc in itertools.chain(window, documents):
+            yield from _split_batch([doc], chunk_size, chunk_overlap)
+        return
+    
+    # This runs in a worker thread while Pinecone and Cohere client threads are
+    # alive; forking a multi-threaded process can deadlock the children on
+    # inherited locks, so start them as fresh interpreters instead
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        while window:
+            results = executor.map(
+                _split_batch,
+                [[doc] for doc in window],
+                itertools.repeat(chunk_size),
+                itertools.repeat(chunk_overlap)
+            )
+            for chunks in results:
+                yield from chunks
+            window = _take(documents, workers * 4)
+
+
+def ensure_index(index_name: str):
+    """
+    Create the Pinecone index if it doesn't exist yet.
+    
+    Serverless indexes handle ANN partitioning and compression internally;
+    dotproduct is the metric Cohere recommends for its int8 embeddings.
+    
+    Args:
+        index_name: Name of the Pinecone index
+    """
+    pc = get_pinecone_client()
+    if pc.has_index(index_name):
+        return
+    
+    print(f"🆕 Creating Pinecone index '{index_name}'...")
+    pc.create_index(
+        name=index_name,
+        dimension=EMBEDDING_DIMENSION,
+        metric="dotproduct",
+        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+    )
+    print(f"✅ Index '{index_name}' is ready\n")
+
+
+def chunk_id(chunk: Document) -> str:
+    """Content-addressed ID for a chunk, stable across ingestion runs."""
+    return hashlib.blake2b(chunk.page_content.encode(), digest_size=16).hexdigest()
+
+
+def delete_stale_namespaces(index) -> List[str]:
+    """
+    Delete this pipeline's namespaces from earlier embedding settings.
+    
+    Only namespaces starting with NAMESPACE_PREFIX are touched; vectors
+    other modules store in the same index are left alone.
+    
+    Args:
+        index: Pinecone Index handle
+        
+    Returns:
+        Names of the deleted namespaces
+    """
+    stale = [
+        namespace for namespace in index.describe_index_stats().namespaces
+        if namespace.startswith(NAMESPACE_PREFIX) and namespace != EMBEDDING_NAMESPACE
+    ]
+    for namespace in stale:
+        print(f"🧹 Deleting namespace '{namespace}' (embedded with other settings)")
+        index.delete(delete_all=True, namespace=namespace)
+    return stale
+
+
+def find_existing_ids(index, ids: List[str]) -> set:
+    """
+    Find which of the given vector IDs are already stored in the index.
+    
+    Args:
+        index: Pinecone Index handle
+        ids: Vector IDs to look up
+        
+    Returns:
+        Set of IDs that already exist
+    """
+    existing = set()
+    for i in range(0, len(ids), FETCH_BATCH_SIZE):
+        response = index.fetch(
+            ids=ids[i:i + FETCH_BATCH_SIZE],
+            namespace=EMBEDDING_NAMESPACE
+        )
+        existing.update(response.vectors.keys())
+    return existing
+
+
+async def embed_texts(
+    embeddings: CohereEmbeddings,
+    texts: List[str]
+) -> List[List[float]]:
+    """
+    Embed texts in Cohere-sized batches, running the batches concurrently.
+    
+    Args:
+        embeddings: Cohere embeddings model
+        texts: Texts to embed
+        
+    Returns:
+        One embedding vector per input text, in the same order
+    """
+    batches = [
+        texts[i:i + EMBED_BATCH_SIZE]
+        for i in range(0, len(texts), EMBED_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(
+        *[embeddings.aembed_documents(batch) for batch in batches]
     )
+    return [vector for batch in results for vector in batch]
+
+
+async def _embed_and_upsert(
+    chunks: Iterator[Document],
+    index,
+    embeddings: CohereEmbeddings
+) -> Tuple[int, int]:
+    """
+    Embed and upsert a stream of chunks one window at a time.
+    
+    While a window is being embedded, the next one is pulled (and split)
+    in a worker thread, and the previous window's upserts finish in the
+    background.
+    
+    Args:
+        chunks: Stream of document chunks
+        index: Pinecone Index handle
+        embeddings: Cohere embeddings model
+        
+    Returns:
+        Tuple of (chunks seen, chunks newly stored)
+    """
+    seen_ids = set()
+    pending_upserts = []
+    total = stored = 0
+    
+    window = await asyncio.to_thread(_take, chunks, STREAM_WINDOW_SIZE)
+    while window:
+        next_window = asyncio.create_task(
+            asyncio.to_thread(_take, chunks, STREAM_WINDOW_SIZE)
+        )
+        total += len(window)
+        
+        # Identical chunks collapse onto the same ID, across windows too
+        window_chunks = {}
+        for chunk in window:
+            chunk_hash = chunk_id(chunk)
+            if chunk_hash not in seen_ids:
+                seen_ids.add(chunk_hash)
+                window_chunks[chunk_hash] = chunk
+        
+        existing_ids = await asyncio.to_thread(
+            find_existing_ids, index, list(window_chunks)
+        )
+        new_chunks = {
+            chunk_hash: chunk for chunk_hash, chunk in window_chunks.items()
+            if chunk_hash not in existing_ids
+        }
+        
+        if new_chunks:
+            texts = [chunk.page_content for chunk in new_chunks.values()]
+            vectors = await embed_texts(embeddings, texts)
+            
+            # PineconeVectorStore reads the chunk text from the "text" metadata key.
+            # Metadata is returned with every query match, so only the fields the
+            # app displays are stored; the vector ID already is the content hash.
+            records = [
+                (chunk_hash, vector, {**chunk.metadata, "text": chunk.page_content})
+                for (chunk_hash, chunk), vector in zip(new_chunks.items(), vectors)
+            ]
+            
+            # Let the previous window's upserts finish before queueing more
+            for future in pending_upserts:
+                await asyncio.to_thread(future.get)
+            pending_upserts = [
+                index.upsert(
+                    vectors=records[i:i + UPSERT_BATCH_SIZE],
+                    namespace=EMBEDDING_NAMESPACE,
+                    async_req=True
+                )
+                for i in range(0, len(records), UPSERT_BATCH_SIZE)
+            ]
+            stored += len(records)
+        
+        window = await next_window
     
-    chunks = text_splitter.split_documents(documents)
-    print(f"✅ Created {len(chunks)} chunks\n")
+    for future in pending_upserts:
+        await asyncio.to_thread(future.get)
     
-    return chunks
+    return total, stored
 
 
 def create_embeddings_and_store(
-    chunks: List[Document],
+    chunks: Iterable[Document],
     index_name: str
-) -> PineconeVectorStore:
+) -> Tuple[PineconeVectorStore, int, int]:
     """
     Create embeddings and store in Pinecone vector database.
     
+    Chunks are consumed as a stream, so only a few embedding batches are
+    held in memory at once. Each chunk is identified by a hash of its
+    content, so chunks already in the index from a previous run are
+    skipped rather than re-embedded. Vectors go to EMBEDDING_NAMESPACE;
+    this pipeline's namespaces for other embedding settings are deleted
+    afterwards. New chunks are embedded with
+    concurrent batched requests and upserted directly (also concurrently),
+    so the vector store never re-embeds them.
+    
     Args:
-        chunks: List of document chunks to embed
+        chunks: Document chunks to embed
         index_name: Name of the Pinecone index
         
     Returns:
-        PineconeVectorStore instance
+        Tuple of (PineconeVectorStore instance, chunks processed,
+        chunks newly stored)
     """
-    print(f"🧠 Creating embeddings with Cohere...")
-    embeddings = CohereEmbeddings(model="embed-english-v3.0")
-    
-    print(f"📊 Storing {len(chunks)} chunks in Pinecone index '{index_name}'...")
+    embeddings = get_embeddings()
     
     try:
-        vectorstore = PineconeVectorStore.from_documents(
-            chunks,
-            embeddings,
-            index_name=index_name
+        ensure_index(index_name)
+        index = get_index(index_name, pool_threads=UPSERT_POOL_THREADS)
+        
+        print(
+            f"🧠 Embedding with Cohere and storing in Pinecone index '{index_name}' "
+            f"(namespace '{EMBEDDING_NAMESPACE}')..."
         )
-        print(f"✅ Successfully stored all chunks in Pinecone!\n")
-        return vectorstore
+        total, stored = asyncio.run(_embed_and_upsert(iter(chunks), index, embeddings))
+        
+        print(f"✅ Created {total} chunks")
+        print(f"♻️  {total - stored} chunks unchanged, skipping")
+        print(f"✅ Stored {stored} new chunks in Pinecone!\n")
+        
+        try:
+            delete_stale_namespaces(index)
+        except Exception as e:
+            print(f"⚠️  Could not remove namespaces from other embedding settings: {e}\n")
+        vectorstore = PineconeVectorStore(
+            index=index,
+            embedding=embeddings,
+            namespace=EMBEDDING_NAMESPACE
+        )
+        return vectorstore, total, stored
         
     except Exception as e:
         print(f"❌ Error storing in Pinecone: {e}")
@@ -165,8 +460,6 @@ def main():
     print(f"🎯 Target Pinecone Index: {index_name}\n")
     
     # Step 1: Load documents from multiple sources
-    all_documents = []
-    
     # Load local file (from Module 01)
     local_file = os.path.join(
         os.path.dirname(__file__),
@@ -175,19 +468,24 @@ def main():
         "mediumblog1.txt"
     )
     local_docs = load_local_documents(local_file)
-    all_documents.extend(local_docs)
     
-    # Load web documents
-    web_docs = load_web_documents()
-    all_documents.extend(web_docs)
-    
-    if not all_documents:
+    # Web documents are streamed through the rest of the pipeline; peek at
+    # the first one so an empty crawl exits before touching Pinecone
+    documents = itertools.chain(local_docs, load_web_documents())
+    first_document = next(documents, None)
+    if first_document is None:
         print("❌ No documents loaded. Exiting...")
         return
     
-    print(f"📚 Total documents loaded: {len(all_documents)}")
-    print(f"   - Local: {len(local_docs)}")
-    print(f"   - Web: {len(web_docs)}\n")
+    document_count = 0
+    
+    def counted(docs: Iterable[Document]) -> Iterator[Document]:
+        nonlocal document_count
+        for doc in docs:
+            document_count += 1
+            yield doc
+    
+    all_documents = counted(itertools.chain([first_document], documents))
     
     # Step 2: Split documents into chunks
     chunks = split_documents(
@@ -197,14 +495,17 @@ def main():
     )
     
     # Step 3: Create embeddings and store
-    vectorstore = create_embeddings_and_store(chunks, index_name)
+    vectorstore, chunk_count, stored_count = create_embeddings_and_store(chunks, index_name)
     
     print("=" * 70)
     print("✨ Ingestion Complete!")
     print("=" * 70)
     print(f"\n📊 Summary:")
-    print(f"   - Total documents processed: {len(all_documents)}")
-    print(f"   - Total chunks created: {len(chunks)}")
+    print(f"   - Total documents processed: {document_count}")
+    print(f"   - Local: {len(local_docs)}")
+    print(f"   - Web: {document_count - len(local_docs)}")
+    print(f"   - Total chunks created: {chunk_count}")
+    print(f"   - New chunks stored: {stored_count}")
     print(f"   - Stored in index: {index_name}")
     print(f"\n🚀 Ready to query! Run: streamlit run app.py")
 
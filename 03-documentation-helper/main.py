@@ -5,87 +5,100 @@ This module provides a CLI interface for querying the documentation
 with conversational memory support.
 """
 
-import os
-from dotenv import load_dotenv
-from langchain_classic import hub
-from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-from langchain_classic.chains.retrieval import create_retrieval_chain
+from concurrent.futures import Future, ThreadPoolExecutor
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_cohere import CohereEmbeddings
 from langchain_pinecone import PineconeVectorStore
 
 from memory import ConversationMemoryManager
 
-load_dotenv()
+# Number of documents retrieved per question
+RETRIEVAL_K = 4
 
 
-def create_retrieval_chain_with_memory(
+def start_retrieval(
+    executor: ThreadPoolExecutor,
     vectorstore: PineconeVectorStore,
-    llm: ChatGoogleGenerativeAI,
-    memory: ConversationMemoryManager
-):
+    query: str
+) -> Future:
     """
-    Create a retrieval chain with conversational memory.
+    Start embedding the query and searching Pinecone in the background.
+    
+    Retrieval only depends on the query, not the chat history, so it can
+    overlap with the rest of the per-turn setup.
     
     Args:
+        executor: Executor to run the retrieval on
         vectorstore: Pinecone vector store
-        llm: Language model
-        memory: Conversation memory manager
+        query: User question
+        
+    Returns:
+        Future resolving to the list of retrieved documents
+    """
+    def retrieve():
+        query_vector = vectorstore.embeddings.embed_query(query)
+        return vectorstore.similarity_search_by_vector(query_vector, k=RETRIEVAL_K)
+    
+    return executor.submit(retrieve)
+
+
+def stream_response(answer_chain, inputs: dict) -> str:
+    """
+    Run the answer chain, printing the answer as it is generated.
+    
+    Args:
+        answer_chain: Stuff-documents chain (bootstrap.ANSWER_CHAIN)
+        inputs: Chain inputs ("input", "chat_history" and "context")
         
     Returns:
-        Configured retrieval chain
+        Full answer text
     """
-    # Get the retrieval QA prompt
-    retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
+    answer_parts = []
     
-    # Create document chain
-    combine_docs_chain = create_stuff_documents_chain(llm, retrieval_qa_chat_prompt)
+    print(f"\n{'='*70}")
+    print("ANSWER:")
+    print(f"{'='*70}")
     
-    # Create retrieval chain
-    retrieval_chain = create_retrieval_chain(
-        retriever=vectorstore.as_retriever(search_kwargs={"k": 4}),
-        combine_docs_chain=combine_docs_chain
-    )
+    for token in answer_chain.stream(inputs):
+        print(token, end="", flush=True)
+        answer_parts.append(token)
     
-    return retrieval_chain
+    if not answer_parts:
+        print("No answer found.", end="")
+    print()
+    
+    return "".join(answer_parts)
 
 
-def format_response(result: dict) -> str:
+def format_sources(context: list) -> str:
     """
-    Format the response with answer and sources.
+    Format the source documents used for an answer.
     
     Args:
-        result: Result dictionary from retrieval chain
+        context: Retrieved documents
         
     Returns:
-        Formatted response string
+        Formatted sources string
     """
-    answer = result.get("answer", "No answer found.")
-    context = result.get("context", [])
+    if not context:
+        return ""
     
     response = f"\n{'='*70}\n"
-    response += "ANSWER:\n"
+    response += "SOURCES:\n"
     response += f"{'='*70}\n"
-    response += f"{answer}\n"
     
-    if context:
-        response += f"\n{'='*70}\n"
-        response += "SOURCES:\n"
-        response += f"{'='*70}\n"
+    # Deduplicate by source in one pass; the first (top-ranked) chunk per
+    # source wins and sources keep their first-seen order
+    unique_docs = {}
+    for doc in context:
+        unique_docs.setdefault(doc.metadata.get("source", "Unknown"), doc)
+    
+    for i, (source, doc) in enumerate(unique_docs.items(), 1):
+        title = doc.metadata.get("title", "")
         
-        seen_sources = set()
-        for i, doc in enumerate(context, 1):
-            source = doc.metadata.get("source", "Unknown")
-            title = doc.metadata.get("title", "")
-            
-            # Avoid duplicate sources
-            if source not in seen_sources:
-                seen_sources.add(source)
-                if title:
-                    response += f"{i}. {title}\n   {source}\n\n"
-                else:
-                    response += f"{i}. {source}\n\n"
+        if title:
+            response += f"{i}. {title}\n   {source}\n\n"
+        else:
+            response += f"{i}. {source}\n\n"
     
     return response
 
@@ -97,25 +110,15 @@ def main():
     print("=" * 70)
     print("\nInitializing system...\n")
     
-    # Initialize components
-    embeddings = CohereEmbeddings(model="embed-english-v3.0")
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
-    
-    index_name = os.getenv("INDEX_NAME")
-    if not index_name:
-        raise ValueError("INDEX_NAME not found in .env file")
-    
-    print(f"📊 Connecting to Pinecone index: {index_name}")
-    vectorstore = PineconeVectorStore(
-        index_name=index_name,
-        embedding=embeddings
-    )
+    # Components are built once, when bootstrap is first imported
+    from bootstrap import ANSWER_CHAIN, INDEX_NAME, VECTORSTORE
+    print(f"📊 Connected to Pinecone index: {INDEX_NAME}")
     
     # Initialize memory
     memory = ConversationMemoryManager(max_history=5)
     
-    # Create retrieval chain
-    retrieval_chain = create_retrieval_chain_with_memory(vectorstore, llm, memory)
+    # Worker for background retrieval
+    executor = ThreadPoolExecutor(max_workers=1)
     
     print("✅ System ready!\n")
     print("=" * 70)
@@ -141,6 +144,10 @@ def main():
                 print("🧹 Conversation history cleared!")
                 continue
             
+            # Kick off retrieval while the history is prepared
+            print("\n🔍 Searching documentation...")
+            retrieval = start_retrieval(executor, VECTORSTORE, query)
+            
             # Add to memory
             memory.add_user_message(query)
             
@@ -148,24 +155,24 @@ def main():
             chat_history = []
             history = memory.get_chat_history()
             for msg in history[:-1]:  # Exclude current message
-                if msg["role"] == "user":
-                    chat_history.append(HumanMessage(content=msg["content"]))
+                if msg.role == "user":
+                    chat_history.append(HumanMessage(content=msg.content))
                 else:
-                    chat_history.append(AIMessage(content=msg["content"]))
+                    chat_history.append(AIMessage(content=msg.content))
             
-            # Query the system
-            print("\n🔍 Searching documentation...")
-            result = retrieval_chain.invoke({
+            # Answer from the retrieved docs, streaming as it arrives
+            context = retrieval.result()
+            answer = stream_response(ANSWER_CHAIN, {
                 "input": query,
-                "chat_history": chat_history
+                "chat_history": chat_history,
+                "context": context
             })
             
             # Add response to memory
-            answer = result.get("answer", "")
             memory.add_ai_message(answer)
             
-            # Display formatted response
-            print(format_response(result))
+            # Display sources
+            print(format_sources(context))
             
         except KeyboardInterrupt:
             print("\n\n👋 Goodbye!")
@@ -6,11 +6,17 @@ documentation helper, enabling multi-turn conversations with
 coreference resolution.
 """
 
-from typing import List, Dict, Any
-from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
+from collections import deque
+from typing import List, Dict, Any, NamedTuple
 from langchain_core.messages import HumanMessage, AIMessage
 
 
+class ChatTurn(NamedTuple):
+    """A single message in the formatted chat history."""
+    role: str
+    content: str
+
+
 class ConversationMemoryManager:
     """Manages conversation history and context for the documentation helper."""
     
@@ -22,43 +28,35 @@ class ConversationMemoryManager:
             max_history: Maximum number of conversation turns to keep
         """
         self.max_history = max_history
-        self.chat_memory = InMemoryChatMessageHistory()
+        # Bounded store of (role, content) turns: the oldest messages are
+        # evicted automatically (*2 because user+ai = 2 messages per turn)
+        self._turns: deque[ChatTurn] = deque(maxlen=max_history * 2)
+        
+        # Prompt-ready lines, kept in step with _turns, and the joined
+        # context string (rebuilt only after the history changes)
+        self._context_parts: deque[str] = deque(maxlen=max_history * 2)
+        self._context_cache: str | None = None
     
     def add_user_message(self, message: str):
         """Add a user message to the conversation history."""
-        self.chat_memory.add_user_message(message)
+        self._turns.append(ChatTurn("user", message))
+        self._context_parts.append(f"Human: {message}")
+        self._context_cache = None
     
     def add_ai_message(self, message: str):
         """Add an AI response to the conversation history."""
-        self.chat_memory.add_ai_message(message)
+        self._turns.append(ChatTurn("assistant", message))
+        self._context_parts.append(f"Assistant: {message}")
+        self._context_cache = None
     
-    def get_chat_history(self) -> List[Dict[str, str]]:
+    def get_chat_history(self) -> List[ChatTurn]:
         """
         Get formatted chat history.
         
         Returns:
-            List of message dictionaries with 'role' and 'content'
+            List of ChatTurn tuples with 'role' and 'content'
         """
-        messages = self.chat_memory.messages
-        
-        # Limit to max_history most recent messages
-        if len(messages) > self.max_history * 2:  # *2 because user+ai = 2 messages
-            messages = messages[-(self.max_history * 2):]
-        
-        formatted_history = []
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                formatted_history.append({
-                    "role": "user",
-                    "content": msg.content
-                })
-            elif isinstance(msg, AIMessage):
-                formatted_history.append({
-                    "role": "assistant",
-                    "content": msg.content
-                })
-        
-        return formatted_history
+        return list(self._turns)
     
     def get_context_string(self) -> str:
         """
@@ -67,25 +65,24 @@ class ConversationMemoryManager:
         Returns:
             Formatted string of conversation history
         """
-        history = self.get_chat_history()
-        
-        if not history:
-            return ""
-        
-        context_parts = []
-        for msg in history:
-            role = "Human" if msg["role"] == "user" else "Assistant"
-            context_parts.append(f"{role}: {msg['content']}")
+        if self._context_cache is None:
+            self._context_cache = "\n".join(self._context_parts)
         
-        return "\n".join(context_parts)
+        return self._context_cache
     
     def clear(self):
         """Clear all conversation history."""
-        self.chat_memory.clear()
+        self._turns.clear()
+        self._context_parts.clear()
+        self._context_cache = None
     
     def get_memory_variables(self) -> Dict[str, Any]:
         """Get memory variables for chain integration."""
-        return {"chat_history": self.chat_memory.messages}
+        chat_history = [
+            HumanMessage(content=content) if role == "user" else AIMessage(content=content)
+            for role, content in self._turns
+        ]
+        return {"chat_history": chat_history}
 
 
 def create_memory_aware_prompt(base_prompt: str, include_history: bool = True) -> str:
@@ -145,8 +142,7 @@ def main():
     
     history = memory.get_chat_history()
     for msg in history:
-        role = msg["role"].upper()
-        print(f"[{role}]: {msg['content']}\n")
+        print(f"[{msg.role.upper()}]: {msg.content}\n")
     
     # Display context string
     print("=" * 60)
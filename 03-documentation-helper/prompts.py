@@ -0,0 +1,45 @@
+"""
+Prompt Loading with Local Caching
+
+This module fetches the retrieval QA prompt from LangChain Hub once and
+keeps it on disk, so later process starts skip the network round trip.
+"""
+
+import functools
+import os
+import pickle
+from langchain_classic import hub
+
+RETRIEVAL_QA_CHAT_PROMPT = "langchain-ai/retrieval-qa-chat"
+
+# Prompts pulled from the hub are cached here between runs
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "langchain_hub")
+
+
+@functools.lru_cache(maxsize=1)
+def get_retrieval_qa_chat_prompt():
+    """
+    Get the retrieval QA chat prompt, using the on-disk copy if present.
+    
+    Returns:
+        ChatPromptTemplate pulled from LangChain Hub
+    """
+    cache_path = os.path.join(CACHE_DIR, "retrieval-qa-chat.pkl")
+    
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not read cached prompt, pulling again: {e}")
+    
+    prompt = hub.pull(RETRIEVAL_QA_CHAT_PROMPT)
+    
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump(prompt, f)
+    except Exception as e:
+        print(f"⚠️  Could not cache prompt: {e}")
+    
+    return prompt
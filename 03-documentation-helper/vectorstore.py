@@ -0,0 +1,84 @@
+"""
+Shared Pinecone Vector Store Access
+
+This module creates the Pinecone client, index handles, and the
+LangChain vector store once per process, so the ingestion pipeline,
+CLI, and Streamlit app don't reconnect on every use.
+"""
+
+import functools
+import os
+from dotenv import load_dotenv
+from langchain_cohere import CohereEmbeddings
+from langchain_pinecone import PineconeVectorStore
+from pinecone import Pinecone
+
+load_dotenv()
+
+EMBEDDING_MODEL = "embed-english-v3.0"
+
+# embed-v3 can return int8-quantized vectors natively. Documents and
+# queries must use the same type, which is why both ingestion and
+# retrieval go through get_embeddings(). Set to "float" to keep full
+# precision (requires re-running ingestion.py after a change).
+EMBEDDING_TYPE = os.getenv("COHERE_EMBEDDING_TYPE", "int8")
+
+# This module's vectors live in their own Pinecone namespace per embedding
+# setup, so they never mix with other modules sharing INDEX_NAME, and a
+# change of model or type starts from an empty namespace
+NAMESPACE_PREFIX = "documentation-helper."
+EMBEDDING_NAMESPACE = f"{NAMESPACE_PREFIX}{EMBEDDING_MODEL}.{EMBEDDING_TYPE}"
+
+
+@functools.lru_cache(maxsize=1)
+def get_pinecone_client() -> Pinecone:
+    """Get the process-wide Pinecone client."""
+    return Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_index(index_name: str, pool_threads: int = 1):
+    """
+    Get a cached handle to a Pinecone index.
+    
+    Args:
+        index_name: Name of the Pinecone index
+        pool_threads: Worker threads for async (async_req=True) requests
+        
+    Returns:
+        Pinecone Index handle
+    """
+    return get_pinecone_client().Index(index_name, pool_threads=pool_threads)
+
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> CohereEmbeddings:
+    """Get the process-wide Cohere embeddings model."""
+    return CohereEmbeddings(
+        model=EMBEDDING_MODEL,
+        embedding_types=[EMBEDDING_TYPE],
+        max_retries=5
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_vectorstore(index_name: str) -> PineconeVectorStore:
+    """
+    Get a cached vector store bound to an existing Pinecone index.
+    
+    Passing the index handle directly skips the vector store's own
+    index lookup on construction. Queries go to EMBEDDING_NAMESPACE. Queries made through the store request
+    metadata only (include_values=False), so the 1024-dim vectors are
+    never sent back with search results.
+    
+    Args:
+        index_name: Name of the Pinecone index
+        
+    Returns:
+        PineconeVectorStore instance
+    """
+    return PineconeVectorStore(
+        index=get_index(index_name),
+        embedding=get_embeddings(),
+        namespace=EMBEDDING_NAMESPACE
+    )
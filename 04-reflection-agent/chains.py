@@ -7,8 +7,16 @@ This module defines the LLM chains for:
 3. Refining content based on feedback
 """
 
+import functools
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from langchain_core.load import dumps
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +24,67 @@ load_dotenv()
 # Initialize LLM
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.7)
 
+# Embeddings used to detect when successive drafts stop changing
+embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+
+
+# Disk cache for chain outputs, keyed by the inputs and each chain's prompt,
+# model and temperature. At temperature > 0 it would replay one sample
+# forever, so it is off by default there; LLM_CACHE=1/0 forces it on/off.
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1" if llm.temperature == 0 else "0") != "0"
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", ".llm_cache"))
+
+
+def chain_fingerprint(chain) -> list:
+    """
+    Describe what a prompt | LLM chain sends: its prompt, model and temperature.
+    
+    Args:
+        chain: Prompt | LLM chain
+        
+    Returns:
+        JSON-serializable fingerprint that changes when any of them does
+    """
+    prompt, model = chain.first, chain.last
+    return [dumps(prompt), model.model, model.temperature]
+
+
+def disk_cached(*chains):
+    """
+    Cache a chain function's output on disk, keyed by its arguments and chains.
+    
+    Args:
+        *chains: Prompt | LLM chains the function runs
+        
+    Returns:
+        Decorator for functions taking and returning JSON-serializable values
+    """
+    fingerprints = [chain_fingerprint(chain) for chain in chains]
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if not CACHE_ENABLED:
+                return func(*args)
+            
+            key = hashlib.sha256(
+                json.dumps([func.__name__, fingerprints, args]).encode()
+            ).hexdigest()
+            path = CACHE_DIR / f"{key}.json"
+            if path.exists():
+                return json.loads(path.read_text(encoding="utf-8"))
+            
+            result = func(*args)
+            CACHE_DIR.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
 
 # Generation Prompt
 GENERATION_PROMPT = ChatPromptTemplate.from_messages([
@@ -33,17 +102,17 @@ If you receive feedback, incorporate it to improve the content."""),
 ])
 
 # Refinement Prompt (when we have reflection feedback)
+# Static instructions come first and the per-iteration draft/feedback last,
+# so the prompt prefix stays identical across iterations (cache friendly)
 REFINEMENT_PROMPT = ChatPromptTemplate.from_messages([
-    ("system", """You are an expert content creator. You previously created this content:
+    ("system", """You are an expert content creator. Your task is to refine the content based
+on the feedback. Address all the points raised while maintaining the core message.
 
+Previous draft:
 {draft}
 
-You received this feedback:
-
-{reflection}
-
-Your task is to refine the content based on the feedback. Address all the points raised
-while maintaining the core message."""),
+Feedback:
+{reflection}"""),
     ("user", "Please create an improved version.")
 ])
 
@@ -70,6 +139,24 @@ refinement_chain = REFINEMENT_PROMPT | llm
 reflection_chain = REFLECTION_PROMPT | llm
 
 
+def stream_content(chain, inputs: dict) -> str:
+    """
+    Run a chain with streaming and collect the full response text.
+    
+    Streaming lets callers watching the run (e.g. graph.stream with
+    stream_mode="messages") show tokens as they arrive.
+    
+    Args:
+        chain: Prompt | LLM chain to run
+        inputs: Prompt variables
+        
+    Returns:
+        Complete response content
+    """
+    return "".join(chunk.content for chunk in chain.stream(inputs))
+
+
+@disk_cached(generation_chain)
 def generate_content(input_text: str) -> str:
     """
     Generate initial content based on user input.
@@ -80,10 +167,10 @@ def generate_content(input_text: str) -> str:
     Returns:
         Generated content
     """
-    result = generation_chain.invoke({"input": input_text})
-    return result.content
+    return stream_content(generation_chain, {"input": input_text})
 
 
+@disk_cached(refinement_chain)
 def refine_content(draft: str, reflection: str) -> str:
     """
     Refine content based on reflection feedback.
@@ -95,13 +182,13 @@ def refine_content(draft: str, reflection: str) -> str:
     Returns:
         Refined content
     """
-    result = refinement_chain.invoke({
+    return stream_content(refinement_chain, {
         "draft": draft,
         "reflection": reflection
     })
-    return result.content
 
 
+@disk_cached(reflection_chain)
 def reflect_on_content(draft: str) -> str:
     """
     Provide critique and feedback on content.
@@ -112,8 +199,20 @@ def reflect_on_content(draft: str) -> str:
     Returns:
         Reflection/critique
     """
-    result = reflection_chain.invoke({"draft": draft})
-    return result.content
+    return stream_content(reflection_chain, {"draft": draft})
+
+
+def embed_draft(draft: str) -> list:
+    """
+    Embed a draft for convergence checks between iterations.
+    
+    Args:
+        draft: Content to embed
+        
+    Returns:
+        Embedding vector
+    """
+    return embeddings.embed_query(draft)
 
 
 if __name__ == "__main__":
@@ -4,41 +4,15 @@ Example Use Cases for Reflection Agent
 This module demonstrates various use cases for the reflection agent.
 """
 
+import logging
+
 from graph import graph
 from state import ReflectionState
 
 
-def run_example(description: str, user_input: str, max_iterations: int = 3):
-    """Run a single example."""
-    print("\n" + "=" * 70)
-    print(f"Example: {description}")
-    print("=" * 70)
-    print(f"\nInput: {user_input}\n")
-    
-    initial_state: ReflectionState = {
-        "input": user_input,
-        "draft": "",
-        "reflection": "",
-        "iteration": 0,
-        "max_iterations": max_iterations
-    }
-    
-    final_state = graph.invoke(initial_state)
-    
-    print("\n" + "=" * 70)
-    print("FINAL RESULT")
-    print("=" * 70)
-    print(f"\n{final_state['draft']}\n")
-
-
-def main():
-    """Run all examples."""
-    print("=" * 70)
-    print("🦜 Reflection Agent - Example Use Cases")
-    print("=" * 70)
-    
-    # Example 1: Tweet Improvement
-    run_example(
+# (description, user input, max iterations) for each example
+EXAMPLES = [
+    (
         "Tweet Improvement",
         """Make this tweet better:
         
@@ -46,43 +20,81 @@ def main():
 After a long wait, it's here- making the implementation of agents 
 across different models with function calling - super easy.
 Made a video covering their newest blog post""",
-        max_iterations=3
-    )
-    
-    # Example 2: Email Polish
-    run_example(
+        3
+    ),
+    (
         "Professional Email",
         """Make this email more professional:
         
 Hey, just wanted to check if you got my last email about the project.
 Let me know when you can. Thanks.""",
-        max_iterations=2
-    )
-    
-    # Example 3: Code Documentation
-    run_example(
+        2
+    ),
+    (
         "Code Documentation",
         """Improve this function docstring:
         
 def process_data(data):
     # does stuff with data
     return result""",
-        max_iterations=2
-    )
-    
-    # Example 4: Blog Post Introduction
-    run_example(
+        2
+    ),
+    (
         "Blog Post Intro",
         """Write an engaging introduction for a blog post about LangGraph:
         
 LangGraph is a new library for building stateful applications with LLMs.""",
-        max_iterations=3
+        3
+    ),
+]
+
+
+def initial_state_for(user_input: str, max_iterations: int) -> ReflectionState:
+    """Build the starting state for one example."""
+    return ReflectionState(input=user_input, max_iterations=max_iterations)
+
+
+def print_result(description: str, user_input: str, final_state: dict):
+    """Print the final result of a single example."""
+    print("\n" + "=" * 70)
+    print(f"Example: {description}")
+    print("=" * 70)
+    print(f"\nInput: {user_input}\n")
+    
+    print("\n" + "=" * 70)
+    print("FINAL RESULT")
+    print("=" * 70)
+    print(f"\n{final_state['draft']}\n")
+
+
+def run_example(description: str, user_input: str, max_iterations: int = 3):
+    """Run a single example."""
+    final_state = graph.invoke(initial_state_for(user_input, max_iterations))
+    print_result(description, user_input, final_state)
+
+
+def main():
+    """Run all examples."""
+    print("=" * 70)
+    print("🦜 Reflection Agent - Example Use Cases")
+    print("=" * 70)
+    
+    # The examples are independent, so run them concurrently; node output
+    # interleaves, and the final results are printed in order afterwards
+    final_states = graph.batch(
+        [initial_state_for(user_input, max_iter) for _, user_input, max_iter in EXAMPLES],
+        config={"max_concurrency": len(EXAMPLES)}
     )
     
+    for (description, user_input, _), final_state in zip(EXAMPLES, final_states):
+        print_result(description, user_input, final_state)
+    
     print("\n" + "=" * 70)
     print("✅ All examples completed!")
     print("=" * 70)
 
 
 if __name__ == "__main__":
+    # Show the graph's node tracing as plain lines on the console
+    logging.basicConfig(format="%(message)s")
     main()
@@ -5,9 +5,59 @@ This module builds the graph structure with nodes and edges
 for the iterative reflection process.
 """
 
+import logging
+import os
+
+import numpy as np
 from langgraph.graph import StateGraph, END
 from state import ReflectionState
-from chains import generate_content, refine_content, reflect_on_content
+from chains import (
+    CACHE_DIR,
+    CACHE_ENABLED,
+    embed_draft,
+    generate_content,
+    refine_content,
+    reflect_on_content
+)
+from semantic_cache import SemanticCache
+
+# Consecutive drafts more similar than this are considered converged
+CONVERGENCE_THRESHOLD = 0.97
+
+# Reflections are reused for drafts at least this similar to a critiqued one
+REFLECTION_CACHE_THRESHOLD = 0.9
+
+# Shared across runs (and persisted with the LLM cache) so reruns warm-start
+reflection_cache = (
+    SemanticCache(CACHE_DIR / "reflections.json", threshold=REFLECTION_CACHE_THRESHOLD)
+    if CACHE_ENABLED else None
+)
+
+# Node tracing goes through logging so it costs nothing when disabled.
+# REFLECTION_VERBOSE=1 adds the banner lines, REFLECTION_VERBOSE=0 silences it.
+logger = logging.getLogger(__name__)
+_VERBOSITY_LEVELS = {"0": logging.WARNING, "1": logging.DEBUG}
+logger.setLevel(_VERBOSITY_LEVELS.get(os.getenv("REFLECTION_VERBOSE"), logging.INFO))
+
+# Full drafts and reflections go to a child logger, so a caller that streams
+# the tokens itself (main.py) can switch just these off
+content_logger = logging.getLogger(f"{__name__}.content")
+
+
+def log_banner(message: str, *args):
+    """Log a message framed by separator lines (separators only at DEBUG)."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("\n%s", "=" * 70)
+        logger.info(message, *args)
+        logger.debug("%s", "=" * 70)
+    else:
+        logger.info("\n" + message, *args)
+
+
+def cosine_similarity(a: list, b: list) -> float:
+    """Cosine similarity between two embedding vectors."""
+    a, b = np.asarray(a), np.asarray(b)
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
 
 def generate_node(state: ReflectionState) -> ReflectionState:
@@ -23,24 +73,32 @@ def generate_node(state: ReflectionState) -> ReflectionState:
     Returns:
         Updated state with new draft
     """
-    print(f"\n{'='*70}")
-    print(f"ITERATION {state['iteration'] + 1}")
-    print(f"{'='*70}")
+    log_banner("ITERATION %d", state.iteration + 1)
     
-    if state["iteration"] == 0:
+    if state.iteration == 0:
         # First iteration: generate initial content
-        print("📝 Generating initial content...")
-        draft = generate_content(state["input"])
+        logger.info("📝 Generating initial content...")
+        draft = generate_content(state.input)
     else:
         # Subsequent iterations: refine based on reflection
-        print("✨ Refining based on feedback...")
-        draft = refine_content(state["draft"], state["reflection"])
+        logger.info("✨ Refining based on feedback...")
+        draft = refine_content(state.draft, state.reflection)
     
     # Update state
-    state["draft"] = draft
-    state["iteration"] += 1
+    state.draft = draft
+    state.iteration += 1
+    
+    # Embed the draft for the convergence check, unless it is the last one.
+    # The check is only an early exit, so an embedding failure just skips it.
+    state.previous_draft_embedding = state.draft_embedding
+    state.draft_embedding = []
+    if state.iteration < state.max_iterations:
+        try:
+            state.draft_embedding = embed_draft(draft)
+        except Exception as e:
+            logger.warning("⚠️  Could not embed draft, skipping convergence check: %s", e)
     
-    print(f"\nDraft:\n{draft}")
+    content_logger.info("\nDraft:\n%s", draft)
     
     return state
 
@@ -55,34 +113,63 @@ def reflect_node(state: ReflectionState) -> ReflectionState:
     Returns:
         Updated state with reflection
     """
-    print(f"\n🤔 Reflecting on content...")
-    
-    reflection = reflect_on_content(state["draft"])
-    state["reflection"] = reflection
-    
-    print(f"\nReflection:\n{reflection}")
+    logger.info("\n🤔 Reflecting on content...")
+    
+    # Only non-final drafts are reflected on, and those are always embedded
+    reflection = None
+    if reflection_cache is not None and state.draft_embedding:
+        # Refinements stay close to the draft they refine, so skip critiques
+        # this run has already acted on
+        reflection = reflection_cache.lookup(
+            state.draft_embedding,
+            exclude=set(state.past_reflections)
+        )
+        if reflection is not None:
+            logger.info("♻️  Reusing the critique of a near-identical draft")
+    
+    if reflection is None:
+        reflection = reflect_on_content(state.draft)
+        if reflection_cache is not None and state.draft_embedding:
+            reflection_cache.add(state.draft, state.draft_embedding, reflection)
+    
+    state.reflection = reflection
+    state.past_reflections.append(reflection)
+    
+    content_logger.info("\nReflection:\n%s", reflection)
     
     return state
 
 
 def should_continue(state: ReflectionState) -> str:
     """
-    Decision function: Determines if we should continue iterating.
+    Decision function: Determines if the new draft needs another reflection.
+    
+    Runs right after generation, so the final draft is never critiqued
+    (its reflection would go unused). Also stops early when the new draft
+    is nearly identical to the previous one.
     
     Args:
         state: Current workflow state
         
     Returns:
-        "continue" to loop back to generate, "end" to finish
+        "continue" to reflect and refine again, "end" to finish
     """
-    if state["iteration"] >= state["max_iterations"]:
-        print(f"\n{'='*70}")
-        print(f"✅ Reached max iterations ({state['max_iterations']})")
-        print(f"{'='*70}")
+    if state.iteration >= state.max_iterations:
+        log_banner("✅ Reached max iterations (%d)", state.max_iterations)
         return "end"
-    else:
-        print(f"\n🔄 Continuing to iteration {state['iteration'] + 1}...")
-        return "continue"
+    
+    # Either embedding is empty on the first draft or if embedding failed
+    if state.previous_draft_embedding and state.draft_embedding:
+        similarity = cosine_similarity(
+            state.previous_draft_embedding,
+            state.draft_embedding
+        )
+        if similarity > CONVERGENCE_THRESHOLD:
+            log_banner("✅ Drafts converged (similarity %.3f)", similarity)
+            return "end"
+    
+    logger.info("\n🔄 Continuing to iteration %d...", state.iteration + 1)
+    return "continue"
 
 
 # Build the graph
@@ -104,19 +191,19 @@ def create_graph():
     workflow.set_entry_point("generate")
     
     # Add edges
-    # Always reflect after generating
-    workflow.add_edge("generate", "reflect")
-    
-    # Conditional edge: continue or end
+    # Conditional edge: reflect on the draft, or end once it is final
     workflow.add_conditional_edges(
-        "reflect",
+        "generate",
         should_continue,
         {
-            "continue": "generate",  # Loop back to generate
-            "end": END               # Finish workflow
+            "continue": "reflect",  # Critique, then refine
+            "end": END              # Finish workflow
         }
     )
     
+    # Always refine after reflecting
+    workflow.add_edge("reflect", "generate")
+    
     # Compile
     app = workflow.compile()
     
@@ -139,16 +226,16 @@ if __name__ == "__main__":
     
     print("\nEdges:")
     print("  - Entry: generate (start here)")
-    print("  - generate → reflect (always)")
-    print("  - reflect → generate (if iteration < max_iterations)")
-    print("  - reflect → END (if iteration >= max_iterations)")
+    print("  - generate → reflect (if iteration < max_iterations)")
+    print("  - generate → END (if iteration >= max_iterations)")
+    print("  - reflect → generate (always)")
     
     print("\nFlow:")
-    print("  Start → Generate → Reflect → Continue? → Yes → Generate → ...")
-    print("                                    ↓")
-    print("                                   No")
-    print("                                    ↓")
-    print("                                   END")
+    print("  Start → Generate → Continue? → Yes → Reflect → Generate → ...")
+    print("                         ↓")
+    print("                        No")
+    print("                         ↓")
+    print("                        END")
     
     print("\n" + "=" * 70)
     print("Graph created successfully!")
@@ -5,14 +5,57 @@ This module provides an interactive command-line interface
 for running the reflection agent.
 """
 
-from graph import graph
+import logging
+
+from graph import cosine_similarity, graph, logger as graph_logger
 from state import ReflectionState
 
+# Heading printed before the streamed output of each node
+NODE_HEADINGS = {"generate": "Draft", "reflect": "Reflection"}
+# State field holding each node's output
+NODE_OUTPUTS = {"generate": "draft", "reflect": "reflection"}
+
+
+def announce_node(node: str, iteration: int) -> int:
+    """
+    Print the progress lines for a node whose output is about to be shown.
+    
+    Args:
+        node: Node name ("generate" or "reflect")
+        iteration: Iterations started so far
+        
+    Returns:
+        Updated iteration count
+    """
+    if node == "generate":
+        iteration += 1
+        print(f"\nITERATION {iteration}")
+        if iteration == 1:
+            print("📝 Generating initial content...")
+        else:
+            print("✨ Refining based on feedback...")
+    else:
+        print(f"\n🔄 Continuing to iteration {iteration + 1}...")
+        print("\n🤔 Reflecting on content...")
+    return iteration
+
+
+def announce_end(state: dict):
+    """Print why the run stopped, from its final state values."""
+    if state["iteration"] >= state["max_iterations"]:
+        print(f"\n✅ Reached max iterations ({state['max_iterations']})")
+    elif state["previous_draft_embedding"] and state["draft_embedding"]:
+        similarity = cosine_similarity(
+            state["previous_draft_embedding"],
+            state["draft_embedding"]
+        )
+        print(f"\n✅ Drafts converged (similarity {similarity:.3f})")
+
 
 def run_reflection_agent(
     user_input: str,
     max_iterations: int = 3
-) -> ReflectionState:
+) -> dict:
     """
     Run the reflection agent on user input.
     
@@ -21,20 +64,47 @@ def run_reflection_agent(
         max_iterations: Maximum number of refinement iterations
         
     Returns:
-        Final state with polished content
+        Final state values (a dict keyed by field name) with polished content
     """
     # Initialize state
-    initial_state: ReflectionState = {
-        "input": user_input,
-        "draft": "",
-        "reflection": "",
-        "iteration": 0,
-        "max_iterations": max_iterations
-    }
+    initial_state = ReflectionState(input=user_input, max_iterations=max_iterations)
     
-    # Run the graph
-    final_state = graph.invoke(initial_state)
+    # Run the graph, printing LLM tokens as they arrive. Progress lines are
+    # printed here too, from the same ordered event stream, so they never
+    # interleave with tokens still being printed (the graph's own logging
+    # runs on its worker thread).
+    final_state = {}
+    iteration = 0
+    streamed_node = None
+    for mode, chunk in graph.stream(
+        initial_state,
+        stream_mode=["messages", "updates", "values"]
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            node = metadata.get("langgraph_node")
+            if node in NODE_HEADINGS and message.content:
+                if streamed_node != node:
+                    iteration = announce_node(node, iteration)
+                    print(f"\n{NODE_HEADINGS[node]}:")
+                    streamed_node = node
+                print(message.content, end="", flush=True)
+        elif mode == "updates":
+            for node, update in chunk.items():
+                if node not in NODE_HEADINGS:
+                    continue
+                if streamed_node == node:
+                    print()
+                else:
+                    # Cached outputs arrive without any token events
+                    iteration = announce_node(node, iteration)
+                    print(f"\n{NODE_HEADINGS[node]}:\n{update[NODE_OUTPUTS[node]]}")
+                streamed_node = None
+        else:
+            final_state = chunk
     
+    if final_state:
+        announce_end(final_state)
     return final_state
 
 
@@ -93,4 +163,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # run_reflection_agent prints progress, drafts and reflections itself, so
+    # keep only the graph's warnings (e.g. a failed draft embedding)
+    logging.basicConfig(format="%(message)s")
+    graph_logger.setLevel(logging.WARNING)
     main()
@@ -0,0 +1,137 @@
+"""
+Semantic Cache for Reflections
+
+This module provides a small embedding-keyed cache: a stored value is
+returned for any new key whose embedding is close enough to a cached one.
+The reflection agent uses it to reuse critiques of near-identical drafts.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Collection, List, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """LRU cache of values keyed by text, looked up by embedding similarity."""
+    
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        threshold: float = 0.9,
+        max_entries: int = 128
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: JSON file to load from and save to (None keeps it in memory)
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum entries kept; least recently used are evicted
+        """
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # key text -> (unit-length embedding, value), least recent first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._load()
+    
+    def lookup(
+        self,
+        embedding: List[float],
+        exclude: Collection[str] = ()
+    ) -> Optional[str]:
+        """
+        Find a cached value for an embedding.
+        
+        Args:
+            embedding: Embedding of the key
+            exclude: Values that must not be returned (e.g. already used)
+        
+        Returns:
+            The most similar cached value above the threshold, or None
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            
+            if self._matrix is None:
+                self._matrix = np.vstack([e for e, _ in self._entries.values()])
+            
+            similarities = self._matrix @ _normalize(embedding)
+            if exclude:
+                excluded = [value in exclude for _, value in self._entries.values()]
+                similarities = np.where(excluded, -np.inf, similarities)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            
+            key = list(self._entries)[best]
+            self._entries.move_to_end(key)
+            self._matrix = None
+            return self._entries[key][1]
+    
+    def add(self, key: str, embedding: List[float], value: str):
+        """
+        Store a value and persist the cache.
+        
+        Args:
+            key: Text the embedding was computed from
+            embedding: Embedding of the key
+            value: Value to return for similar keys
+        """
+        with self._lock:
+            self._entries[key] = (_normalize(embedding), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._save()
+    
+    def _load(self):
+        """Load cached entries from disk, if present."""
+        if self.path is None or not self.path.exists():
+            return
+        
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load semantic cache: {e}")
+            return
+        
+        for entry in entries[-self.max_entries:]:
+            self._entries[entry["key"]] = (
+                _normalize(entry["embedding"]),
+                entry["value"]
+            )
+    
+    def _save(self):
+        """Write cached entries to disk."""
+        if self.path is None:
+            return
+        
+        entries = [
+            {"key": key, "embedding": embedding.tolist(), "value": value}
+            for key, (embedding, value) in self._entries.items()
+        ]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps(entries, separators=(",", ":"), ensure_ascii=False),
+                encoding="utf-8"
+            )
+            tmp_path.replace(self.path)
+        except OSError as e:
+            print(f"Warning: Could not save semantic cache: {e}")
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    """Return the embedding as a unit-length float32 vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
@@ -5,28 +5,41 @@ This module defines the state structure that flows through the
 reflection workflow in LangGraph.
 """
 
-from typing import TypedDict
+from dataclasses import dataclass, field
+from typing import List
 
 
-class ReflectionState(TypedDict):
+@dataclass(slots=True)
+class ReflectionState:
     """
     State for the reflection agent workflow.
     
     This state is passed between nodes and tracks the entire
     reflection process from initial input to final polished output.
+    A slotted dataclass keeps each per-node instance small and gives
+    fast attribute access; only input and max_iterations are required.
     """
     
     # User's original request
     input: str
     
     # Current draft of the content
-    draft: str
+    draft: str = ""
     
     # Reflection/critique of the current draft
-    reflection: str
+    reflection: str = ""
     
     # Current iteration number (starts at 0)
-    iteration: int
+    iteration: int = 0
     
     # Maximum iterations allowed
-    max_iterations: int
+    max_iterations: int = 3
+    
+    # Embeddings of the current and previous drafts (empty until computed),
+    # used to stop early once drafts converge
+    draft_embedding: List[float] = field(default_factory=list)
+    previous_draft_embedding: List[float] = field(default_factory=list)
+    
+    # Reflections already applied in this run; a cached critique is never
+    # reused for a later draft of the same run
+    past_reflections: List[str] = field(default_factory=list)
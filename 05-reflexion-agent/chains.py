@@ -5,8 +5,16 @@ This module defines the LLM chains for generation with memory
 and reflection with failure analysis.
 """
 
+import functools
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from langchain_core.load import dumps
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,23 +22,85 @@ load_dotenv()
 # Initialize LLM
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0.7)
 
+# Embeddings used to retrieve lessons relevant to a task
+embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
 
-# Generation Prompt (with memory)
-GENERATION_PROMPT = ChatPromptTemplate.from_messages([
-    ("system", """You are an expert problem solver. Generate a solution to the task.
 
-IMPORTANT: Learn from past experiences!
+# Disk cache for chain outputs, keyed by the inputs and each chain's prompt,
+# model and temperature. At temperature > 0 it would replay one sample
+# forever, so it is off by default there; LLM_CACHE=1/0 forces it on/off.
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1" if llm.temperature == 0 else "0") != "0"
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", ".llm_cache"))
 
-Past Lessons Learned:
-{memory}
 
-Apply these lessons to avoid repeating past mistakes.
+def chain_fingerprint(chain) -> list:
+    """
+    Describe what a prompt | LLM chain sends: its prompt, model and temperature.
+    
+    Args:
+        chain: Prompt | LLM chain
+        
+    Returns:
+        JSON-serializable fingerprint that changes when any of them does
+    """
+    prompt, model = chain.first, chain.last
+    return [dumps(prompt), model.model, model.temperature]
+
+
+def disk_cached(*chains):
+    """
+    Cache a chain function's output on disk, keyed by its arguments and chains.
+    
+    Args:
+        *chains: Prompt | LLM chains the function runs
+        
+    Returns:
+        Decorator for functions taking and returning JSON-serializable values
+    """
+    fingerprints = [chain_fingerprint(chain) for chain in chains]
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if not CACHE_ENABLED:
+                return func(*args)
+            
+            key = hashlib.sha256(
+                json.dumps([func.__name__, fingerprints, args]).encode()
+            ).hexdigest()
+            path = CACHE_DIR / f"{key}.json"
+            if path.exists():
+                return json.loads(path.read_text(encoding="utf-8"))
+            
+            result = func(*args)
+            CACHE_DIR.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
+# Generation Prompt (with memory)
+# Guidelines come before the lessons so the static prefix is shared by every
+# call, even as lessons accumulate
+GENERATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert problem solver. Generate a solution to the task.
 
 Guidelines:
 - Write clean, correct code
 - Handle edge cases (empty input, None, etc.)
 - Include proper error handling
-- Follow best practices"""),
+- Follow best practices
+
+IMPORTANT: Learn from past experiences!
+Apply these lessons to avoid repeating past mistakes.
+
+Past Lessons Learned:
+{memory}"""),
     ("user", "Task: {task}\n\nGenerate a Python function to solve this task.")
 ])
 
@@ -57,31 +127,81 @@ Analyze this failure and extract ONE specific lesson to remember.""")
 ])
 
 
+# Shown in the generation prompt when there are no lessons yet
+NO_LESSONS_TEXT = "No past lessons yet."
+
+
 # Create chains
 generation_chain = GENERATION_PROMPT | llm
 reflection_chain = REFLECTION_PROMPT | llm
 
+# First attempts on a fresh memory always use the same memory text,
+# so bind it once up front
+generation_chain_no_memory = GENERATION_PROMPT.partial(memory=NO_LESSONS_TEXT) | llm
+
 
-def generate_solution(task: str, memory: list) -> str:
+def format_lessons(memory: list) -> str:
+    """
+    Format lessons as the bulleted memory text for the generation prompt.
+    
+    Args:
+        memory: List of past lessons
+        
+    Returns:
+        One "- lesson" line per lesson, or NO_LESSONS_TEXT if empty
+    """
+    return "\n".join(f"- {lesson}" for lesson in memory) if memory else NO_LESSONS_TEXT
+
+
+@disk_cached(generation_chain, generation_chain_no_memory)
+def generate_solution(task: str, memory_text: str) -> str:
     """
     Generate a solution using past lessons.
     
     Args:
         task: Task description
-        memory: List of past lessons
+        memory_text: Past lessons, preformatted with format_lessons()
         
     Returns:
         Generated solution code
     """
-    memory_text = "\n".join(f"- {lesson}" for lesson in memory) if memory else "No past lessons yet."
-    
-    result = generation_chain.invoke({
-        "task": task,
-        "memory": memory_text
-    })
+    if memory_text == NO_LESSONS_TEXT:
+        result = generation_chain_no_memory.invoke({"task": task})
+    else:
+        result = generation_chain.invoke({
+            "task": task,
+            "memory": memory_text
+        })
     return result.content
 
 
+@disk_cached(generation_chain, generation_chain_no_memory)
+def generate_candidates(task: str, memory_text: str, k: int) -> list:
+    """
+    Generate k alternative solutions in one batched request.
+    
+    The prompts are identical; sampling temperature makes the candidates
+    differ. Batching costs k times the tokens of one attempt but about
+    the wall time of one.
+    
+    Args:
+        task: Task description
+        memory_text: Past lessons, preformatted with format_lessons()
+        k: Number of candidates
+        
+    Returns:
+        List of k generated solutions
+    """
+    if memory_text == NO_LESSONS_TEXT:
+        results = generation_chain_no_memory.batch([{"task": task}] * k)
+    else:
+        results = generation_chain.batch(
+            [{"task": task, "memory": memory_text}] * k
+        )
+    return [result.content for result in results]
+
+
+@disk_cached(reflection_chain)
 def reflect_on_failure(task: str, solution: str, error: str) -> str:
     """
     Analyze failure and extract lesson.
@@ -102,6 +222,19 @@ def reflect_on_failure(task: str, solution: str, error: str) -> str:
     return result.content
 
 
+def embed_texts(texts: list) -> list:
+    """
+    Embed a batch of texts for episodic memory retrieval.
+    
+    Args:
+        texts: Texts to embed
+        
+    Returns:
+        One embedding vector per text
+    """
+    return embeddings.embed_documents(texts)
+
+
 if __name__ == "__main__":
     """Demo: Test the chains"""
     print("=" * 70)
@@ -112,7 +245,7 @@ if __name__ == "__main__":
     print("1. GENERATION (No Memory)")
     print("-" * 70)
     task = "Write a function to reverse a string"
-    solution = generate_solution(task, [])
+    solution = generate_solution(task, format_lessons([]))
     print(f"Task: {task}")
     print(f"Solution:\n{solution}\n")
     
@@ -129,7 +262,7 @@ if __name__ == "__main__":
     print("-" * 70)
     task2 = "Write a function to check if a string is a palindrome"
     memory = [reflection]
-    solution2 = generate_solution(task2, memory)
+    solution2 = generate_solution(task2, format_lessons(memory))
     print(f"Task: {task2}")
     print(f"Memory: {memory[0][:100]}...")
     print(f"Solution:\n{solution2}\n")
@@ -4,8 +4,7 @@ Example Use Cases for Reflexion Agent
 This module demonstrates cross-task learning with related tasks.
 """
 
-from graph import graph, global_memory
-from state import ReflexionState
+from graph import graph, global_memory, initial_state_for, run_config
 
 
 def run_task(description: str, task: str, max_attempts: int = 5):
@@ -15,21 +14,11 @@ def run_task(description: str, task: str, max_attempts: int = 5):
     print("=" * 70)
     print(f"\nDescription: {task}\n")
     
-    # Get relevant lessons
-    relevant_lessons = global_memory.get_relevant_lessons(task, limit=5)
-    
-    initial_state: ReflexionState = {
-        "task": task,
-        "solution": "",
-        "validation_result": {},
-        "reflection": "",
-        "memory": relevant_lessons,
-        "attempt": 0,
-        "max_attempts": max_attempts,
-        "success": False
-    }
-    
-    final_state = graph.invoke(initial_state)
+    # Start from the relevant lessons learned so far
+    final_state = graph.invoke(
+        initial_state_for(task, max_attempts),
+        config=run_config(max_attempts)
+    )
     
     print("\n" + "=" * 70)
     if final_state['success']:
@@ -5,14 +5,50 @@ This module builds the graph structure with episodic memory
 and external validation for learning across tasks.
 """
 
+import sys
+import threading
+from typing import List
+
 from langgraph.graph import StateGraph, END
 from state import ReflexionState
-from chains import generate_solution, reflect_on_failure
+from chains import (
+    embed_texts,
+    format_lessons,
+    generate_candidates,
+    generate_solution,
+    reflect_on_failure,
+)
 from validators import validate_code
 from memory import EpisodicMemory
 
-# Global memory instance
-global_memory = EpisodicMemory()
+# Global memory instance, retrieving lessons by semantic similarity
+global_memory = EpisodicMemory(embed_fn=embed_texts)
+
+# Node progress output; stream consumers can set this to False and
+# render progress from the streamed states instead
+EMIT_OUTPUT = True
+
+# Per-thread buffer of emitted lines, so nodes running concurrently in
+# batch_invoke each write their output as one block
+_output = threading.local()
+
+
+def emit(message: str = ""):
+    """Queue node progress output unless EMIT_OUTPUT has been turned off."""
+    if EMIT_OUTPUT:
+        buffer = getattr(_output, "lines", None)
+        if buffer is None:
+            buffer = _output.lines = []
+        buffer.append(message)
+
+
+def flush_output():
+    """Write queued progress output with a single write and flush."""
+    buffer = getattr(_output, "lines", None)
+    if buffer:
+        sys.stdout.write("\n".join(buffer) + "\n")
+        sys.stdout.flush()
+        buffer.clear()
 
 
 def generate_node(state: ReflexionState) -> ReflexionState:
@@ -25,22 +61,35 @@ def generate_node(state: ReflexionState) -> ReflexionState:
     Returns:
         Updated state with new solution
     """
-    print(f"\n{'='*70}")
-    print(f"ATTEMPT {state['attempt'] + 1}")
-    print(f"{'='*70}")
+    emit(f"\n{'='*70}")
+    emit(f"ATTEMPT {state.attempt + 1}")
+    emit(f"{'='*70}")
     
-    print(f"📝 Generating solution...")
-    if state['memory']:
-        print(f"💡 Using {len(state['memory'])} past lessons")
+    emit(f"📝 Generating solution...")
+    if state.memory:
+        emit(f"💡 Using {len(state.memory)} past lessons")
+    if state.speculative_k > 1:
+        emit(f"🎲 Sampling {state.speculative_k} candidates in one batch")
+    flush_output()
     
     # Generate solution using memory
-    solution = generate_solution(state["task"], state["memory"])
+    if state.speculative_k > 1:
+        state.candidates = generate_candidates(
+            state.task, state.memory_text, state.speculative_k
+        )
+        solution = state.candidates[0]
+    else:
+        solution = generate_solution(state.task, state.memory_text)
     
     # Update state
-    state["solution"] = solution
-    state["attempt"] += 1
+    state.solution = solution
+    state.attempt += 1
     
-    print(f"\nSolution:\n{solution}")
+    if state.candidates:
+        emit(f"\nGenerated {len(state.candidates)} candidate solutions")
+    else:
+        emit(f"\nSolution:\n{solution}")
+    flush_output()
     
     return state
 
@@ -55,23 +104,42 @@ def validate_node(state: ReflexionState) -> ReflexionState:
     Returns:
         Updated state with validation results
     """
-    print(f"\n🧪 Running validation tests...")
+    emit(f"\n🧪 Running validation tests...")
+    flush_output()
     
     # Extract test cases from task (simplified)
     # In production, tests would be provided separately
-    tests = get_tests_for_task(state["task"])
-    
-    # Validate the solution
-    result = validate_code(state["solution"], tests)
+    tests = get_tests_for_task(state.task)
+    
+    # Validate the solution, or each candidate until one passes
+    candidates = state.candidates or [state.solution]
+    first_result = None
+    for number, candidate in enumerate(candidates, 1):
+        result = validate_code(candidate, tests)
+        if result["success"]:
+            state.solution = candidate
+            if len(candidates) > 1:
+                emit(f"🏁 Candidate {number}/{len(candidates)} passed")
+                emit(f"\nSolution:\n{candidate}")
+            break
+        if first_result is None:
+            first_result = result
+    else:
+        # None passed; reflect on the first candidate's failure
+        result = first_result
+        state.solution = candidates[0]
+        if len(candidates) > 1:
+            emit(f"\nSolution (candidate 1):\n{state.solution}")
     
-    state["validation_result"] = result
-    state["success"] = result["success"]
+    state.validation_result = result
+    state.success = result["success"]
     
     if result["success"]:
-        print(f"✅ All tests passed! ({result['passed_tests']}/{result['total_tests']})")
+        emit(f"✅ All tests passed! ({result['passed_tests']}/{result['total_tests']})")
     else:
-        print(f"❌ Tests failed: {result['passed_tests']}/{result['total_tests']}")
-        print(f"Error: {result['error']}")
+        emit(f"❌ Tests failed: {result['passed_tests']}/{result['total_tests']}")
+        emit(f"Error: {result['error']}")
+    flush_output()
     
     return state
 
@@ -86,32 +154,39 @@ def reflect_node(state: ReflexionState) -> ReflexionState:
     Returns:
         Updated state with reflection
     """
-    print(f"\n🤔 Reflecting on failure...")
+    emit(f"\n🤔 Reflecting on failure...")
+    flush_output()
     
-    error = state["validation_result"].get("error", "Unknown error")
+    error = state.validation_result.get("error", "Unknown error")
     
     # Generate reflection
     reflection = reflect_on_failure(
-        state["task"],
-        state["solution"],
+        state.task,
+        state.solution,
         error
     )
     
-    state["reflection"] = reflection
+    state.reflection = reflection
     
     # Add to memory for next attempt
-    state["memory"].append(reflection)
+    state.memory.append(reflection)
+    lesson_line = f"- {reflection}"
+    if len(state.memory) == 1:
+        state.memory_text = lesson_line
+    else:
+        state.memory_text = f"{state.memory_text}\n{lesson_line}"
     
     # Store in global memory
     global_memory.add_lesson(
-        task=state["task"],
-        solution=state["solution"],
+        task=state.task,
+        solution=state.solution,
         error=error,
         lesson=reflection,
         success=False
     )
     
-    print(f"\n💡 Lesson Learned:\n{reflection}")
+    emit(f"\n💡 Lesson Learned:\n{reflection}")
+    flush_output()
     
     return state
 
@@ -126,16 +201,17 @@ def success_node(state: ReflexionState) -> ReflexionState:
     Returns:
         Updated state
     """
-    print(f"\n🎉 Success! Storing successful pattern...")
+    emit(f"\n🎉 Success! Storing successful pattern...")
     
     # Store success in global memory
     global_memory.add_lesson(
-        task=state["task"],
-        solution=state["solution"],
+        task=state.task,
+        solution=state.solution,
         error="",
-        lesson=f"Successful approach for: {state['task']}",
+        lesson=f"Successful approach for: {state.task}",
         success=True
     )
+    flush_output()
     
     return state
 
@@ -150,7 +226,7 @@ def check_validation(state: ReflexionState) -> str:
     Returns:
         "success" if passed, "failure" if failed
     """
-    return "success" if state["success"] else "failure"
+    return "success" if state.success else "failure"
 
 
 def should_retry(state: ReflexionState) -> str:
@@ -163,17 +239,49 @@ def should_retry(state: ReflexionState) -> str:
     Returns:
         "retry" to try again, "give_up" to stop
     """
-    if state["attempt"] >= state["max_attempts"]:
-        print(f"\n{'='*70}")
-        print(f"❌ Reached max attempts ({state['max_attempts']})")
-        print(f"{'='*70}")
-        return "give_up"
+    if state.attempt >= state.max_attempts:
+        emit(f"\n{'='*70}")
+        emit(f"❌ Reached max attempts ({state.max_attempts})")
+        emit(f"{'='*70}")
+        decision = "give_up"
     else:
-        print(f"\n🔄 Retrying with new lesson (attempt {state['attempt'] + 1})...")
-        return "retry"
+        emit(f"\n🔄 Retrying with new lesson (attempt {state.attempt + 1})...")
+        decision = "retry"
+    flush_output()
+    return decision
 
 
-def get_tests_for_task(task: str) -> list:
+# Test cases per task keyword, built once and shared by every lookup
+# (validate_code only reads them). "args" is always the tuple of
+# positional arguments, so no per-test shape check is needed.
+TASK_TESTS = {
+    "reverse": (
+        {"args": ("hello",), "expected": "olleh"},
+        {"args": ("",), "expected": ""},
+        {"args": ("a",), "expected": "a"},
+        {"args": ("racecar",), "expected": "racecar"}
+    ),
+    "palindrome": (
+        {"args": ("racecar",), "expected": True},
+        {"args": ("hello",), "expected": False},
+        {"args": ("",), "expected": True},
+        {"args": ("a",), "expected": True}
+    ),
+    "vowel": (
+        {"args": ("hello",), "expected": 2},
+        {"args": ("",), "expected": 0},
+        {"args": ("aeiou",), "expected": 5},
+        {"args": ("xyz",), "expected": 0}
+    ),
+}
+
+# Default tests
+DEFAULT_TESTS = (
+    {"args": ("test",), "expected": "test"},
+)
+
+
+def get_tests_for_task(task: str) -> tuple:
     """
     Get test cases for a task.
     
@@ -184,37 +292,16 @@ def get_tests_for_task(task: str) -> list:
         task: Task description
         
     Returns:
-        List of test cases
+        Tuple of test cases (shared; do not modify)
     """
     # Simple keyword matching for demo
     task_lower = task.lower()
     
-    if "reverse" in task_lower:
-        return [
-            {"input": "hello", "expected": "olleh"},
-            {"input": "", "expected": ""},
-            {"input": "a", "expected": "a"},
-            {"input": "racecar", "expected": "racecar"}
-        ]
-    elif "palindrome" in task_lower:
-        return [
-            {"input": "racecar", "expected": True},
-            {"input": "hello", "expected": False},
-            {"input": "", "expected": True},
-            {"input": "a", "expected": True}
-        ]
-    elif "vowel" in task_lower:
-        return [
-            {"input": "hello", "expected": 2},
-            {"input": "", "expected": 0},
-            {"input": "aeiou", "expected": 5},
-            {"input": "xyz", "expected": 0}
-        ]
-    else:
-        # Default tests
-        return [
-            {"input": "test", "expected": "test"}
-        ]
+    for keyword, tests in TASK_TESTS.items():
+        if keyword in task_lower:
+            return tests
+    
+    return DEFAULT_TESTS
 
 
 # Build the graph
@@ -264,16 +351,86 @@ def create_graph():
         }
     )
     
-    # Compile
-    app = workflow.compile()
+    # Compile (runs are short-lived, so no checkpointer)
+    app = workflow.compile(checkpointer=None)
     
     return app
 
 
-# Create the graph instance
+# Create the graph instance once; it serves invoke/stream, their async
+# variants and batch for every task
 graph = create_graph()
 
 
+def initial_state_for(
+    task: str,
+    max_attempts: int,
+    speculative_k: int = 1
+) -> ReflexionState:
+    """
+    Build the starting state for a task, seeded with past lessons.
+    
+    Args:
+        task: Task description
+        max_attempts: Maximum number of attempts
+        speculative_k: Candidate solutions per attempt (1 disables speculation)
+        
+    Returns:
+        Initial workflow state
+    """
+    # Get relevant lessons from global memory
+    relevant_lessons = global_memory.get_relevant_lessons(task, limit=5)
+    
+    # Initialize state
+    return ReflexionState(
+        task=task,
+        memory=relevant_lessons,  # Start with past lessons!
+        memory_text=format_lessons(relevant_lessons),
+        baseline_lesson_count=len(relevant_lessons),
+        max_attempts=max_attempts,
+        speculative_k=speculative_k
+    )
+
+
+def run_config(max_attempts: int) -> dict:
+    """
+    Build the run config for a task.
+    
+    Each attempt takes at most three steps (generate, validate, then
+    reflect or success), so the recursion limit follows max_attempts
+    instead of LangGraph's fixed default of 25.
+    
+    Args:
+        max_attempts: Maximum number of attempts
+        
+    Returns:
+        Config dict for graph.invoke/stream/batch
+    """
+    return {"recursion_limit": 3 * max_attempts + 1}
+
+
+def batch_invoke(tasks: List[str], max_attempts: int = 5) -> List[dict]:
+    """
+    Run several independent tasks concurrently.
+    
+    Each task starts from the lessons in memory when the batch begins,
+    so tasks in the same batch do not learn from each other.
+    
+    Args:
+        tasks: Task descriptions
+        max_attempts: Maximum number of attempts per task
+        
+    Returns:
+        Final state values for each task, in order
+    """
+    config = run_config(max_attempts)
+    config["max_concurrency"] = 8
+    return graph.batch(
+        [initial_state_for(task, max_attempts) for task in tasks],
+        config=config
+    )
+
+
 if __name__ == "__main__":
     """Demo: Visualize the graph structure"""
     print("=" * 70)
@@ -5,41 +5,66 @@ This module provides an interactive command-line interface
 for running the Reflexion agent with cross-task learning.
 """
 
-from graph import graph, global_memory
-from state import ReflexionState
+import asyncio
+
+from graph import graph, global_memory, initial_state_for, run_config
 
 
 def run_reflexion_agent(
     task: str,
-    max_attempts: int = 5
-) -> ReflexionState:
+    max_attempts: int = 5,
+    speculative_k: int = 1
+) -> dict:
     """
     Run the Reflexion agent on a task.
     
     Args:
         task: Task description
         max_attempts: Maximum number of attempts
+        speculative_k: Candidate solutions generated per attempt in one
+            batch; the first to pass is kept. Trades about k times the
+            tokens for fewer sequential retries (1 disables it)
         
     Returns:
-        Final state with solution
+        Final state values (a dict keyed by field name) with solution
     """
-    # Get relevant lessons from global memory
-    relevant_lessons = global_memory.get_relevant_lessons(task, limit=5)
+    # Stream the graph; each event is the full state after a node
+    final_state = {}
+    for state in graph.stream(
+        initial_state_for(task, max_attempts, speculative_k),
+        config=run_config(max_attempts),
+        stream_mode="values"
+    ):
+        final_state = state
     
-    # Initialize state
-    initial_state: ReflexionState = {
-        "task": task,
-        "solution": "",
-        "validation_result": {},
-        "reflection": "",
-        "memory": relevant_lessons,  # Start with past lessons!
-        "attempt": 0,
-        "max_attempts": max_attempts,
-        "success": False
-    }
+    return final_state
+
+
+async def run_reflexion_agent_async(
+    task: str,
+    max_attempts: int = 5,
+    speculative_k: int = 1
+) -> dict:
+    """
+    Run the Reflexion agent on a task without blocking the event loop.
     
-    # Run the graph
-    final_state = graph.invoke(initial_state)
+    Args:
+        task: Task description
+        max_attempts: Maximum number of attempts
+        speculative_k: Candidate solutions generated per attempt in one
+            batch; the first to pass is kept. Trades about k times the
+            tokens for fewer sequential retries (1 disables it)
+        
+    Returns:
+        Final state values (a dict keyed by field name) with solution
+    """
+    final_state = {}
+    async for state in graph.astream(
+        initial_state_for(task, max_attempts, speculative_k),
+        config=run_config(max_attempts),
+        stream_mode="values"
+    ):
+        final_state = state
     
     return final_state
 
@@ -108,7 +133,7 @@ def main():
             task_count += 1
             print(f"\n🚀 Starting task #{task_count}: {task}")
             
-            final_state = run_reflexion_agent(task, max_attempts)
+            final_state = asyncio.run(run_reflexion_agent_async(task, max_attempts))
             
             # Display final result
             print("\n" + "=" * 70)
@@ -124,7 +149,7 @@ def main():
             print(f"📊 Statistics:")
             print(f"   - Total attempts: {final_state['attempt']}")
             print(f"   - Max attempts: {final_state['max_attempts']}")
-            print(f"   - Lessons learned this task: {len(final_state['memory']) - len(global_memory.get_relevant_lessons(task, limit=5))}")
+            print(f"   - Lessons learned this task: {len(final_state['memory']) - final_state['baseline_lesson_count']}")
             
             # Show updated memory stats
             stats = global_memory.get_stats()
@@ -5,10 +5,37 @@ This module manages the agent's episodic memory, storing lessons
 learned from past failures and successes for future tasks.
 """
 
-import json
+import hashlib
 import os
-from typing import List, Dict, Any
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Any, Deque, Callable, Optional
+
+import numpy as np
+
+try:
+    import orjson
+    
+    def _dumps_line(entry: Dict[str, Any]) -> bytes:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib
+    import json
+    
+    def _dumps_line(entry: Dict[str, Any]) -> bytes:
+        return (json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+    
+    _loads = json.loads
+
+# Maximum number of memories kept; the oldest are evicted first
+MAX_MEMORIES = 200
+
+# New embedding rows appended to the tail file before it is folded into
+# the .npy sidecar (which is rewritten whole)
+EMBEDDING_TAIL_ROWS = 32
 
 
 class EpisodicMemory:
@@ -19,15 +46,46 @@ class EpisodicMemory:
     retrieval mechanisms for relevant past experiences.
     """
     
-    def __init__(self, memory_file: str = "reflexion_memory.json"):
+    def __init__(
+        self,
+        memory_file: str = "reflexion_memory.jsonl",
+        max_memories: int = MAX_MEMORIES,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None
+    ):
         """
         Initialize episodic memory.
         
         Args:
-            memory_file: Path to JSON file for persistent storage
+            memory_file: Path to JSON Lines file for persistent storage
+            max_memories: Maximum number of memories to keep
+            embed_fn: Embeds a batch of texts; enables semantic retrieval
+                (without it, the most recent lessons are returned)
         """
         self.memory_file = memory_file
-        self.memories: List[Dict[str, Any]] = []
+        self.max_memories = max_memories
+        self.embed_fn = embed_fn
+        # Unit-length float32 embeddings, one row per entry in memories (same
+        # order). None means "rebuild on use". On disk they live in a .npy
+        # sidecar plus a raw float32 tail of recent rows, with a hash of each
+        # row's embedded text in a keys file so a load can check that the
+        # rows still belong to the lessons they are attached to.
+        base = os.path.splitext(memory_file)[0]
+        self.embeddings_file = base + ".npy"
+        self.embeddings_tail_file = base + ".tail.f32"
+        self.embeddings_keys_file = base + ".keys.u64"
+        self._emb: Optional[np.ndarray] = None
+        self._keys: Optional[np.ndarray] = None
+        self._tail_rows = 0
+        # Bounded store: footprint and retrieval cost stay fixed as lessons
+        # accumulate. Writers take the lock; readers iterate without it.
+        self.memories: Deque[Dict[str, Any]] = deque(maxlen=max_memories)
+        self._lock = threading.RLock()
+        # Append handle for the memory file, opened on the first new lesson
+        self._fh = None
+        # get_relevant_lessons results, reset whenever memories change
+        self._relevant_cache: Dict[tuple, List[str]] = {}
+        # Successful entries in memories, kept in step so get_stats is O(1)
+        self._n_success = 0
         self.load()
     
     def add_lesson(
@@ -54,11 +112,155 @@ class EpisodicMemory:
             "error": error,
             "lesson": lesson,
             "success": success,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": time.time()  # Epoch seconds
         }
         
-        self.memories.append(memory_entry)
-        self.save()
+        with self._lock:
+            if self.embed_fn is not None:
+                self._add_embedding(memory_entry)
+            if len(self.memories) == self.max_memories:
+                # The deque is about to evict the oldest entry
+                self._n_success -= bool(self.memories[0]["success"])
+            self._n_success += bool(success)
+            self.memories.append(memory_entry)
+            self._relevant_cache.clear()
+            self._append_entry(memory_entry)
+    
+    @staticmethod
+    def _embedding_text(entry: Dict[str, Any]) -> str:
+        """Text embedded for a memory entry."""
+        return f"{entry['task']} {entry['lesson']}"
+    
+    @classmethod
+    def _row_keys(cls, entries) -> np.ndarray:
+        """Hash each entry's embedded text, identifying its embedding row."""
+        return np.array(
+            [
+                int.from_bytes(
+                    hashlib.blake2b(cls._embedding_text(e).encode(), digest_size=8).digest(),
+                    "little"
+                )
+                for e in entries
+            ],
+            dtype=np.uint64
+        )
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as a matrix of unit-length float32 rows."""
+        vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+        return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-9)
+    
+    def _add_embedding(self, entry: Dict[str, Any]):
+        """Add the embedding row for an entry about to be appended."""
+        if self._emb is None or len(self._emb) != len(self.memories):
+            # Index is missing or stale; rebuild it on the next retrieval
+            self._discard_embeddings()
+            return
+        
+        try:
+            row = self._embed([self._embedding_text(entry)])
+        except Exception as e:
+            print(f"Warning: Could not embed lesson: {e}")
+            self._discard_embeddings()
+            return
+        
+        key = self._row_keys([entry])
+        current, current_keys = self._emb, self._keys
+        if len(self.memories) == self.max_memories:
+            # The deque evicts the oldest entry
+            current, current_keys = current[1:], current_keys[1:]
+        self._emb = np.vstack([current, row])
+        self._keys = np.concatenate([current_keys, key])
+        
+        if self._tail_rows >= EMBEDDING_TAIL_ROWS:
+            self._save_embeddings()
+            return
+        try:
+            # Row first: a crash in between leaves more rows than keys,
+            # which the next load rejects
+            with open(self.embeddings_tail_file, 'ab') as f:
+                row.tofile(f)
+            with open(self.embeddings_keys_file, 'ab') as f:
+                key.tofile(f)
+            self._tail_rows += 1
+        except OSError as e:
+            print(f"Warning: Could not append memory embedding: {e}")
+            self._save_embeddings()
+    
+    def _embedding_index(self) -> np.ndarray:
+        """Return the embedding matrix, (re)building it if needed."""
+        if self._emb is None or len(self._emb) != len(self.memories):
+            texts = [self._embedding_text(m) for m in self.memories]
+            self._emb = self._embed(texts)
+            self._keys = self._row_keys(self.memories)
+            self._save_embeddings()
+        return self._emb
+    
+    def _save_embeddings(self):
+        """Write the embedding matrix to its .npy sidecar, folding in the tail."""
+        try:
+            tmp_file = self.embeddings_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                np.save(f, self._emb)
+            tmp_keys_file = self.embeddings_keys_file + ".tmp"
+            self._keys.tofile(tmp_keys_file)
+            os.replace(tmp_file, self.embeddings_file)
+            os.replace(tmp_keys_file, self.embeddings_keys_file)
+            if os.path.exists(self.embeddings_tail_file):
+                os.remove(self.embeddings_tail_file)
+            self._tail_rows = 0
+        except Exception as e:
+            print(f"Warning: Could not save memory embeddings: {e}")
+    
+    def _discard_embeddings(self):
+        """Drop the embedding index and its files so it is rebuilt on use."""
+        self._emb = None
+        self._keys = None
+        self._tail_rows = 0
+        for path in (self.embeddings_file, self.embeddings_tail_file, self.embeddings_keys_file):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _load_embeddings(self):
+        """
+        Memory-map the sidecar embeddings if they match the memories.
+        
+        The stored rows must belong to the last lines of the memory file:
+        their keys are compared with hashes of the loaded lessons, and on
+        any mismatch the index is rebuilt on the next retrieval.
+        """
+        self._emb = None
+        self._keys = None
+        self._tail_rows = 0
+        if self.embed_fn is None or not os.path.exists(self.embeddings_file):
+            return
+        
+        try:
+            emb = np.load(self.embeddings_file, mmap_mode="r")
+            if os.path.exists(self.embeddings_tail_file):
+                tail = np.fromfile(self.embeddings_tail_file, dtype=np.float32)
+                tail = tail.reshape(-1, emb.shape[1])
+                self._tail_rows = len(tail)
+                emb = np.vstack([emb, tail])
+            keys = np.fromfile(self.embeddings_keys_file, dtype=np.uint64)
+        except Exception as e:
+            print(f"Warning: Could not load memory embeddings: {e}")
+            return
+        
+        n = len(self.memories)
+        expected = self._row_keys(self.memories)
+        aligned = (
+            len(keys) == len(emb)
+            and len(keys) >= n
+            and np.array_equal(keys[len(keys) - n:], expected)
+        )
+        if not aligned:
+            print("📝 Memory embeddings are out of date; rebuilding on next retrieval")
+            self._tail_rows = 0
+            return
+        
+        self._emb = emb[len(emb) - n:]
+        self._keys = expected
     
     def get_all_lessons(self) -> List[str]:
         """
@@ -73,8 +275,8 @@ class EpisodicMemory:
         """
         Get lessons relevant to the current task.
         
-        For simplicity, returns the most recent lessons.
-        In production, you'd use semantic similarity.
+        With an embed_fn, lessons are ranked by semantic similarity to the
+        task; otherwise (or if embedding fails) the most recent are returned.
         
         Args:
             task: Current task description
@@ -83,15 +285,53 @@ class EpisodicMemory:
         Returns:
             List of relevant lesson strings
         """
-        # Simple approach: return most recent lessons
-        # In production: use embeddings for semantic search
-        recent_lessons = self.get_all_lessons()[-limit:]
-        return recent_lessons
+        key = (task, limit)
+        lessons = self._relevant_cache.get(key)
+        if lessons is None:
+            if self.embed_fn is not None and self.memories and limit > 0:
+                lessons = self._semantic_lessons(task, limit)
+            if lessons is None:
+                # Fall back to the most recent lessons
+                newest = islice(reversed(self.memories), max(limit, 0))
+                lessons = [m["lesson"] for m in newest][::-1]
+            self._relevant_cache[key] = lessons
+        
+        # Return a copy: callers extend their lesson list during a task
+        return list(lessons)
+    
+    def _semantic_lessons(self, task: str, limit: int) -> Optional[List[str]]:
+        """
+        Rank lessons by cosine similarity to the task.
+        
+        Args:
+            task: Current task description
+            limit: Maximum number of lessons to return
+            
+        Returns:
+            Most similar lessons first, or None if embedding failed
+        """
+        with self._lock:
+            try:
+                emb = self._embedding_index()
+                query = self._embed([task])[0]
+            except Exception as e:
+                print(f"Warning: Semantic retrieval failed, using recent lessons: {e}")
+                return None
+            
+            # Select the top k in O(n), then sort just those k
+            scores = emb @ query
+            k = min(limit, len(scores))
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            top = candidates[np.argsort(-scores[candidates])]
+            memories = list(self.memories)
+            return [memories[i]["lesson"] for i in top]
     
     def get_success_patterns(self) -> List[Dict[str, Any]]:
         """
         Get patterns from successful attempts.
         
+        Scans all memories; use get_stats() when only the count is needed.
+        
         Returns:
             List of successful memory entries
         """
@@ -101,38 +341,75 @@ class EpisodicMemory:
         """
         Get patterns from failed attempts.
         
+        Scans all memories; use get_stats() when only the count is needed.
+        
         Returns:
             List of failed memory entries
         """
         return [m for m in self.memories if not m["success"]]
     
-    def save(self):
-        """Save memory to disk."""
+    def _append_entry(self, entry: Dict[str, Any]):
+        """Append a single memory entry to the file as one JSON line."""
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump({"memories": self.memories}, f, indent=2)
+            if self._fh is None:
+                self._fh = open(self.memory_file, 'ab', buffering=0)
+            self._fh.write(_dumps_line(entry))
         except Exception as e:
             print(f"Warning: Could not save memory: {e}")
     
+    def save(self):
+        """Rewrite the memory file with exactly the current memories."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            try:
+                with open(self.memory_file, 'wb') as f:
+                    f.write(b"".join(_dumps_line(entry) for entry in self.memories))
+            except Exception as e:
+                print(f"Warning: Could not save memory: {e}")
+            if self._emb is not None:
+                # Keep the sidecar aligned with the rewritten file
+                self._save_embeddings()
+    
     def load(self):
         """Load memory from disk."""
+        line_count = 0
         if os.path.exists(self.memory_file):
             try:
-                with open(self.memory_file, 'r') as f:
-                    data = json.load(f)
-                    self.memories = data.get("memories", [])
+                self.memories.clear()
+                self._relevant_cache.clear()
+                with open(self.memory_file, 'rb') as f:
+                    for line in f:
+                        if line.strip():
+                            self.memories.append(_loads(line))
+                            line_count += 1
+                
+                self._load_embeddings()
+                # Drop lines for memories evicted by the size bound
+                if line_count > self.max_memories:
+                    self.save()
+                self._n_success = sum(1 for m in self.memories if m["success"])
                 print(f"✅ Loaded {len(self.memories)} memories from {self.memory_file}")
             except Exception as e:
                 print(f"Warning: Could not load memory: {e}")
-                self.memories = []
+                self.memories.clear()
+                self._n_success = 0
+                self._emb = None
         else:
             print(f"📝 Starting with empty memory (no {self.memory_file} found)")
-            self.memories = []
+            self.memories.clear()
+            self._n_success = 0
+            self._load_embeddings()
     
     def clear(self):
         """Clear all memories."""
-        self.memories = []
-        self.save()
+        with self._lock:
+            self.memories.clear()
+            self._relevant_cache.clear()
+            self._n_success = 0
+            self._discard_embeddings()
+            self.save()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -142,8 +419,8 @@ class EpisodicMemory:
             Dictionary with memory stats
         """
         total = len(self.memories)
-        successes = len(self.get_success_patterns())
-        failures = len(self.get_failure_patterns())
+        successes = self._n_success
+        failures = total - successes
         
         return {
             "total_memories": total,
@@ -160,7 +437,7 @@ if __name__ == "__main__":
     print("=" * 70 + "\n")
     
     # Create memory manager
-    memory = EpisodicMemory("demo_memory.json")
+    memory = EpisodicMemory("demo_memory.jsonl")
     
     # Add some lessons
     print("Adding lessons to memory...\n")
@@ -211,4 +488,4 @@ if __name__ == "__main__":
         print(f"\nTask: {pattern['task']}")
         print(f"Lesson: {pattern['lesson']}")
     
-    print("\n✅ Memory saved to demo_memory.json")
+    print("\n✅ Memory saved to demo_memory.jsonl")
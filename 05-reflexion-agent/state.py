@@ -5,37 +5,55 @@ This module defines the state structure with episodic memory
 for the Reflexion workflow in LangGraph.
 """
 
-from typing import TypedDict, List
+from dataclasses import dataclass, field
+from typing import List
 
 
-class ReflexionState(TypedDict):
+@dataclass(slots=True)
+class ReflexionState:
     """
     State for the Reflexion agent workflow.
     
     This state includes episodic memory that persists lessons
     learned from past failures, enabling cross-task learning.
+    A slotted dataclass keeps each per-node instance small and gives
+    fast attribute access; only task is required.
     """
     
     # Current task description
     task: str
     
     # Current solution attempt
-    solution: str
+    solution: str = ""
+    
+    # Solutions generated together in one speculative attempt; validation
+    # keeps the first that passes
+    candidates: List[str] = field(default_factory=list)
+    
+    # Candidates generated per attempt (1 disables speculation)
+    speculative_k: int = 1
     
     # Validation results from external checks
-    validation_result: dict
+    validation_result: dict = field(default_factory=dict)
     
     # Reflection/analysis of failure
-    reflection: str
+    reflection: str = ""
     
     # Episodic memory: lessons learned from past attempts
-    memory: List[str]
+    memory: List[str] = field(default_factory=list)
+    
+    # The same lessons formatted for the generation prompt, kept in step
+    # with memory so it is not rebuilt on every attempt
+    memory_text: str = ""
+    
+    # Number of lessons memory started with, to count the ones learned
+    baseline_lesson_count: int = 0
     
     # Current attempt number (starts at 0)
-    attempt: int
+    attempt: int = 0
     
     # Maximum attempts allowed
-    max_attempts: int
+    max_attempts: int = 5
     
     # Whether the task succeeded
-    success: bool
+    success: bool = False
@@ -0,0 +1,60 @@
+"""
+Tests for the disk cache around the Reflexion agent's chains
+
+Run with: python -m pytest 05-reflexion-agent
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+# The chains module builds its clients at import; no request is ever sent
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+import chains
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chains, "CACHE_ENABLED", True)
+    monkeypatch.setattr(chains, "CACHE_DIR", tmp_path)
+
+
+def cached_counter(chain, calls):
+    """A cached chain function that records every real call."""
+    @chains.disk_cached(chain)
+    def answer(task):
+        calls.append(task)
+        return f"answer to {task}"
+
+    return answer
+
+
+def make_chain(system, model="gemini-2.5-flash-lite"):
+    prompt = ChatPromptTemplate.from_messages([("system", system), ("user", "{task}")])
+    return prompt | ChatGoogleGenerativeAI(model=model, temperature=0.7)
+
+
+def test_identical_chain_hits_cache():
+    calls = []
+    cached_counter(make_chain("Solve it."), calls)("reverse a string")
+    cached_counter(make_chain("Solve it."), calls)("reverse a string")
+    assert calls == ["reverse a string"]
+
+
+def test_prompt_change_misses_cache():
+    calls = []
+    cached_counter(make_chain("Solve it."), calls)("reverse a string")
+    cached_counter(make_chain("Solve it carefully."), calls)("reverse a string")
+    assert len(calls) == 2
+
+
+def test_model_change_misses_cache():
+    calls = []
+    cached_counter(make_chain("Solve it."), calls)("reverse a string")
+    cached_counter(make_chain("Solve it.", model="gemini-2.5-pro"), calls)("reverse a string")
+    assert len(calls) == 2
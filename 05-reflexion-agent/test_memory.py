@@ -0,0 +1,60 @@
+"""
+Tests for the Reflexion agent's episodic memory
+
+Run with: python -m pytest 05-reflexion-agent
+"""
+
+import zlib
+
+import numpy as np
+
+from memory import EpisodicMemory
+
+
+def fake_embed(texts):
+    """Deterministic embeddings that differ for every text."""
+    vectors = []
+    for text in texts:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        vectors.append(rng.standard_normal(16).tolist())
+    return vectors
+
+
+def add(memory, task, lesson):
+    memory.add_lesson(task=task, solution="", error="", lesson=lesson)
+
+
+def test_embeddings_survive_reload(tmp_path):
+    path = str(tmp_path / "memory.jsonl")
+    memory = EpisodicMemory(path, embed_fn=fake_embed)
+    add(memory, "reverse a string", "check empty input")
+    memory.get_relevant_lessons("warm up the index")
+    for i in range(5):
+        add(memory, f"task {i}", f"lesson {i}")
+    
+    reloaded = EpisodicMemory(path, embed_fn=fake_embed)
+    
+    assert reloaded._emb is not None
+    assert np.allclose(reloaded._emb, memory._emb)
+
+
+def test_lessons_added_without_embeddings_invalidate_sidecar(tmp_path):
+    path = str(tmp_path / "memory.jsonl")
+    memory = EpisodicMemory(path, max_memories=2, embed_fn=fake_embed)
+    add(memory, "reverse a string", "check empty input")
+    add(memory, "sum a list", "start the total at zero")
+    memory.get_relevant_lessons("reverse a string")  # Writes the sidecar
+    
+    # A session without embed_fn appends lessons but no embedding rows;
+    # the row count still matches the (bounded) number of memories
+    plain = EpisodicMemory(path, max_memories=2)
+    add(plain, "parse a date", "use ISO 8601")
+    add(plain, "count vowels", "lowercase first")
+    
+    reloaded = EpisodicMemory(path, max_memories=2, embed_fn=fake_embed)
+    
+    assert reloaded._emb is None
+    # Querying with a lesson's exact embedded text must return that lesson
+    for entry in reloaded.memories:
+        query = f"{entry['task']} {entry['lesson']}"
+        assert reloaded.get_relevant_lessons(query, limit=1) == [entry["lesson"]]
@@ -0,0 +1,93 @@
+"""
+Tests for the Reflexion agent's validators
+
+Run with: python -m pytest 05-reflexion-agent
+"""
+
+import pickle
+
+from validators import validate_code
+
+# Long enough that validation always goes through the sandbox worker
+SANDBOX_PADDING = "\n# " + "x" * 600
+
+ECHO_TESTS = [{"args": ("a",), "expected": "a"}] * 3
+
+
+class _Payload:
+    """Pickle payload that would run code in whichever process loads it."""
+    
+    def __reduce__(self):
+        return (exec, ("raise SystemExit('unpickled in the agent process')",))
+
+
+def test_sandbox_result_cannot_be_forged_through_stdout():
+    forged = pickle.dumps({"success": True, "payload": _Payload()})
+    code = (
+        "import os\n"
+        f"os.write(1, {forged!r})\n"
+        "os._exit(0)\n"
+        "def f(s):\n"
+        "    return s\n"
+    ) + SANDBOX_PADDING
+    
+    result = validate_code(code, ECHO_TESTS)
+    
+    assert result["success"] is False
+    assert result["error"] == "Validation worker returned no valid result"
+
+
+def test_sandbox_ignores_solution_prints():
+    code = "def f(s):\n    print('noise')\n    return s\n" + SANDBOX_PADDING
+    
+    assert validate_code(code, ECHO_TESTS)["success"] is True
+
+
+def test_sandbox_times_out_infinite_loops():
+    code = "def f(s):\n    while True:\n        pass\n" + SANDBOX_PADDING
+    
+    result = validate_code(code, ECHO_TESTS)
+    
+    assert result["success"] is False
+    assert result["passed_tests"] == 0
+
+
+def test_entry_point_skips_trailing_private_helper():
+    code = (
+        "def reverse(s):\n"
+        "    return _clean(s)[::-1]\n"
+        "\n"
+        "def _clean(s):\n"
+        "    return s.strip()\n"
+    )
+    tests = [{"args": (" ab ",), "expected": "ba"}]
+    
+    assert validate_code(code, tests)["success"] is True
+
+
+def test_entry_point_skips_trailing_test_function():
+    code = (
+        "def reverse(s):\n"
+        "    return s[::-1]\n"
+        "\n"
+        "def test_reverse():\n"
+        "    assert reverse('ab') == 'ba'\n"
+    )
+    tests = [{"args": ("ab",), "expected": "ba"}]
+    
+    assert validate_code(code, tests)["success"] is True
+
+
+def test_entry_point_honours_dunder_all():
+    code = (
+        "__all__ = ['solve']\n"
+        "\n"
+        "def helper(s):\n"
+        "    return s\n"
+        "\n"
+        "def solve(s):\n"
+        "    return helper(s).upper()\n"
+    )
+    tests = [{"args": ("ab",), "expected": "AB"}]
+    
+    assert validate_code(code, tests)["success"] is True
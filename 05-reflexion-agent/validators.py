@@ -7,34 +7,216 @@ evaluate solutions with actual tests and rules.
 
 import sys
 import io
-from typing import List, Dict, Any
+import os
+import ast
+import hashlib
+import json
+import pickle
+import subprocess
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 import traceback
 
+# Compiled solutions, their entry-point names and whether they provably
+# terminate, keyed by source hash, so retries of the same code skip parsing
+# and bytecode generation
+CODE_CACHE_SIZE = 128
+_CODE_CACHE: "OrderedDict[bytes, Tuple[types.CodeType, Optional[str], bool]]" = OrderedDict()
 
-def validate_code(code: str, tests: List[Dict[str, Any]]) -> Dict[str, Any]:
+# Constructs that can run unboundedly (loops, comprehensions, huge powers)
+# or pull in code we cannot see (imports, lambdas)
+_UNBOUNDED_NODES = (
+    ast.For, ast.AsyncFor, ast.While,
+    ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp,
+    ast.Import, ast.ImportFrom, ast.Lambda, ast.Pow,
+)
+
+# Builtins whose cost is bounded by the size of their arguments
+_BOUNDED_BUILTINS = frozenset({
+    "abs", "all", "any", "bool", "chr", "dict", "enumerate", "float", "int",
+    "isinstance", "len", "list", "max", "min", "ord", "repr", "reversed",
+    "round", "set", "sorted", "str", "sum", "tuple", "zip",
+})
+
+
+def _is_straight_line(tree: ast.AST) -> bool:
     """
-    Validate Python code by running test cases.
+    Check that code has no loops, imports or recursion.
+    
+    Only bounded builtins and methods may be called, and the code's own
+    functions and classes are never referenced, so it cannot loop or
+    recurse and is safe to run without a timeout.
+    
+    Args:
+        tree: Parsed solution code
+        
+    Returns:
+        True if the code is straight-line
+    """
+    nodes = list(ast.walk(tree))
+    defined = {
+        node.name for node in nodes
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    }
+    for node in nodes:
+        if isinstance(node, _UNBOUNDED_NODES):
+            return False
+        if isinstance(node, ast.Name) and node.id in defined:
+            return False  # Possible recursion, direct or through an alias
+        if isinstance(node, ast.Attribute) and node.attr in defined:
+            return False  # Possible recursion through a method
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                if node.func.id not in _BOUNDED_BUILTINS:
+                    return False
+            elif not isinstance(node.func, ast.Attribute):
+                return False  # A call through a call or subscript
+    return True
+
+
+def _entry_point(tree: ast.Module) -> Optional[str]:
+    """
+    Pick the function under test from a parsed solution.
+    
+    A function named in a literal __all__ wins; otherwise the first
+    top-level function that is not private (_name) or a test (test*).
+    
+    Args:
+        tree: Parsed solution code
+        
+    Returns:
+        Function name, or None if there is none
+    """
+    functions = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+    
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets)
+        ):
+            try:
+                exported = ast.literal_eval(node.value)
+            except ValueError:
+                break
+            for name in exported if isinstance(exported, (list, tuple)) else ():
+                if name in functions:
+                    return name
+    
+    return next(
+        (name for name in functions if not name.startswith(("_", "test"))),
+        None
+    )
+
+
+def _compiled(code: str) -> Tuple[types.CodeType, Optional[str], bool]:
+    """
+    Compile solution code, reusing the result for repeated sources.
+    
+    The function under test is picked from the syntax tree (see
+    _entry_point) rather than by scanning the namespace.
+    
+    Args:
+        code: Python source to compile
+        
+    Returns:
+        Tuple of (compiled code object, function name or None,
+        whether the code is straight-line)
+    """
+    key = hashlib.blake2b(code.encode(), digest_size=16).digest()
+    entry = _CODE_CACHE.get(key)
+    if entry is None:
+        tree = ast.parse(code, "<solution>")
+        func_name = _entry_point(tree)
+        entry = (compile(tree, "<solution>", "exec"), func_name, _is_straight_line(tree))
+        _CODE_CACHE[key] = entry
+        if len(_CODE_CACHE) > CODE_CACHE_SIZE:
+            _CODE_CACHE.popitem(last=False)
+    else:
+        _CODE_CACHE.move_to_end(key)
+    return entry
+
+
+def _as_args(test: Dict[str, Any]) -> tuple:
+    """
+    Get a test's positional arguments.
+    
+    Tests give them as an 'args' tuple, or (older shape) as a single
+    'input' that is unpacked only if it is a list or tuple.
+    """
+    if "args" in test:
+        return test["args"]
+    
+    test_input = test.get("input")
+    if isinstance(test_input, (list, tuple)):
+        return tuple(test_input)
+    return (test_input,)
+
+
+# Suites with at least this many tests run their cases on a shared pool,
+# so solutions that block (I/O, sleep) are not timed serially
+PARALLEL_TEST_THRESHOLD = 4
+_TEST_POOL = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 2))
+
+
+def _run_one(func: Callable, args: tuple) -> Tuple[Any, Optional[Exception]]:
+    """Call the function on one test's arguments, capturing any exception."""
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, e
+
+
+def _outcomes(func: Callable, cases: List[tuple]) -> Iterator[Tuple[Any, Optional[Exception]]]:
+    """
+    Yield (result, exception) for each test case, in order.
+    
+    Small suites run lazily on the calling thread, so a caller that stops
+    early skips the remaining tests. Larger suites run concurrently, and
+    tests not yet started are cancelled when the caller stops.
+    
+    Args:
+        func: Function under test
+        cases: List of (args, expected) pairs
+    """
+    if len(cases) < PARALLEL_TEST_THRESHOLD:
+        for args, _ in cases:
+            yield _run_one(func, args)
+        return
+    
+    futures = [_TEST_POOL.submit(_run_one, func, args) for args, _ in cases]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _run_validation(
+    code: str,
+    tests: List[Dict[str, Any]],
+    collect_details: bool = False
+) -> Dict[str, Any]:
+    """
+    Validate Python code by running test cases in the current process.
+    
+    By default, stops at the first failing test and reports it in 'error'
+    ('passed_tests' then counts the tests before it). With collect_details,
+    runs every test and records a per-test entry in 'details'.
     
     Args:
         code: Python code to validate
-        tests: List of test cases with 'input' and 'expected' keys
+        tests: List of test cases with 'args' (or 'input') and 'expected' keys
+        collect_details: Run all tests and fill in per-test details
         
     Returns:
         Dictionary with validation results
     """
     try:
-        # Create a namespace for execution
-        namespace = {}
-        
-        # Execute the code
-        exec(code, namespace)
-        
-        # Find the function (assume first function defined)
-        func_name = None
-        for name, obj in namespace.items():
-            if callable(obj) and not name.startswith('_'):
-                func_name = name
-                break
+        code_obj, func_name, _ = _compiled(code)
         
         if not func_name:
             return {
@@ -45,47 +227,67 @@ def validate_code(code: str, tests: List[Dict[str, Any]]) -> Dict[str, Any]:
                 "details": []
             }
         
+        # Create a namespace for execution and run the code
+        namespace = {}
+        exec(code_obj, namespace)
         func = namespace[func_name]
         
+        # Normalize each test to (args, expected) once, before running any
+        cases = [(_as_args(test), test.get("expected")) for test in tests]
+        
+        if not collect_details:
+            passed = 0
+            error = ""
+            outcomes = _outcomes(func, cases)
+            for i, ((_, expected), (result, exc)) in enumerate(zip(cases, outcomes)):
+                if exc is not None:
+                    error = f"Test {i + 1}: raised {type(exc).__name__}: {exc}"
+                    break
+                if result != expected:
+                    error = f"Test {i + 1}: expected {expected!r}, got {result!r}"
+                    break
+                passed += 1
+            outcomes.close()
+            
+            return {
+                "success": passed == len(tests),
+                "error": error,
+                "passed_tests": passed,
+                "total_tests": len(tests),
+                "details": []
+            }
+        
         # Run tests
         passed = 0
         details = []
         
-        for i, test in enumerate(tests):
-            try:
-                test_input = test.get("input")
-                expected = test.get("expected")
-                
-                # Handle different input types
-                if isinstance(test_input, (list, tuple)):
-                    result = func(*test_input)
-                else:
-                    result = func(test_input)
-                
-                if result == expected:
-                    passed += 1
-                    details.append({
-                        "test": i + 1,
-                        "passed": True,
-                        "input": test_input,
-                        "expected": expected,
-                        "got": result
-                    })
-                else:
-                    details.append({
-                        "test": i + 1,
-                        "passed": False,
-                        "input": test_input,
-                        "expected": expected,
-                        "got": result,
-                        "error": f"Expected {expected}, got {result}"
-                    })
-            except Exception as e:
+        outcomes = _outcomes(func, cases)
+        for i, (test, (args, expected), (result, exc)) in enumerate(zip(tests, cases, outcomes)):
+            test_input = test.get("input", args)
+            if exc is not None:
                 details.append({
                     "test": i + 1,
                     "passed": False,
                     "input": test_input,
-                    "error": str(e)
+                    "error": str(exc)
+                })
+            elif result == expected:
+                passed += 1
+                details.append({
+                    "test": i + 1,
+                    "passed": True,
+                    "input": test_input,
+                    "expected": expected,
+                    "got": result
+                })
+            else:
+                details.append({
+                    "test": i + 1,
+                    "passed": False,
+                    "input": test_input,
+                    "expected": expected,
+                    "got": result,
+                    "error": f"Expected {expected}, got {result}"
                 })
         
         success = passed == len(tests)
@@ -109,6 +311,234 @@ def validate_code(code: str, tests: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
 
 
+# Solutions are untrusted LLM output, so anything beyond a trivial check
+# runs in its own short-lived worker process with resource limits: a hang
+# is cut off by the timeout and a runaway loop or allocation kills only that
+# worker, never the agent or other validations.
+SANDBOX_WORKERS = 2           # Validations running at once; others wait
+VALIDATION_TIMEOUT = 3        # Wall-clock seconds per validation, from its start
+SANDBOX_CPU_SECONDS = 2       # CPU seconds per validation
+SANDBOX_MEMORY_BYTES = 1 << 30
+# Straight-line solutions at most this long with at most this many tests run
+# in-process, where starting a worker would cost more than the tests themselves
+INPROCESS_MAX_CODE_LENGTH = 512
+INPROCESS_MAX_TESTS = 2
+
+# Workers are fresh interpreters (not forks of this multi-threaded process)
+# that import this module and call _sandbox_main. The job arrives pickled on
+# stdin (from us, so trusted); the result goes back as JSON on a dedicated
+# pipe, and the worker's stdout and stderr are /dev/null.
+SANDBOX_COMMAND = (
+    "import sys; sys.path.insert(0, sys.argv[1]); "
+    "import validators; validators._sandbox_main(int(sys.argv[2]))"
+)
+_SANDBOX_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Time spent waiting for a slot does not count against VALIDATION_TIMEOUT
+_sandbox_slots = threading.BoundedSemaphore(SANDBOX_WORKERS)
+
+
+def _plain_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a validation result to JSON-safe fields (values as repr strings)."""
+    details = []
+    for detail in result.get("details", []):
+        plain = {}
+        for key, value in detail.items():
+            if key in ("test", "passed"):
+                plain[key] = value
+            elif key == "error":
+                plain[key] = str(value)
+            else:
+                plain[key] = repr(value)
+        details.append(plain)
+    return {
+        "success": result["success"] is True,
+        "error": str(result["error"]),
+        "passed_tests": int(result["passed_tests"]),
+        "total_tests": int(result["total_tests"]),
+        "details": details
+    }
+
+
+def _sandbox_main(result_fd: int):
+    """
+    Run one validation in a worker process.
+    
+    Reads a pickled (code, tests, collect_details) job from stdin, applies
+    CPU and memory limits, and writes the result as JSON to result_fd.
+    
+    Args:
+        result_fd: Write end of the result pipe
+    """
+    code, tests, collect_details = pickle.load(sys.stdin.buffer)
+    result_pipe = os.fdopen(result_fd, "wb")
+    
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (SANDBOX_MEMORY_BYTES, SANDBOX_MEMORY_BYTES))
+        resource.setrlimit(
+            resource.RLIMIT_CPU,
+            (SANDBOX_CPU_SECONDS, SANDBOX_CPU_SECONDS + 1)
+        )
+    except (ImportError, ValueError, OSError):
+        pass  # Not supported on this platform; the timeout still applies
+    
+    result = _run_validation(code, tests, collect_details)
+    try:
+        payload = json.dumps(_plain_result(result))
+    except Exception as e:
+        payload = json.dumps({
+            "success": False,
+            "error": f"Validation result could not be returned: {e}",
+            "passed_tests": 0,
+            "total_tests": len(tests),
+            "details": []
+        })
+    result_pipe.write(payload.encode())
+    result_pipe.close()
+
+
+def _parse_sandbox_result(payload: bytes, total_tests: int) -> Dict[str, Any]:
+    """
+    Check a worker's JSON result, treating anything unexpected as a failure.
+    
+    Args:
+        payload: Bytes read from the result pipe
+        total_tests: Number of tests submitted
+        
+    Returns:
+        Dictionary with validation results
+    """
+    try:
+        result = json.loads(payload)
+        valid = (
+            isinstance(result, dict)
+            and isinstance(result.get("success"), bool)
+            and isinstance(result.get("error"), str)
+            and type(result.get("passed_tests")) is int
+            and 0 <= result["passed_tests"] <= total_tests
+            and result.get("total_tests") == total_tests
+            and isinstance(result.get("details"), list)
+        )
+    except ValueError:
+        valid = False
+    
+    if valid:
+        return result
+    return {
+        "success": False,
+        "error": "Validation worker returned no valid result",
+        "passed_tests": 0,
+        "total_tests": total_tests,
+        "details": []
+    }
+
+
+def _sandboxed_validation(
+    code: str,
+    tests: List[Dict[str, Any]],
+    collect_details: bool
+) -> Dict[str, Any]:
+    """
+    Run one validation in a new worker process with its own deadline.
+    
+    Per-test detail values come back as repr strings.
+    
+    Args:
+        code: Python code to validate
+        tests: List of test cases
+        collect_details: Run all tests and fill in per-test details
+        
+    Returns:
+        Dictionary with validation results
+    """
+    with _sandbox_slots:
+        read_fd, write_fd = os.pipe()
+        try:
+            try:
+                process = subprocess.Popen(
+                    [sys.executable, "-I", "-c", SANDBOX_COMMAND, _SANDBOX_DIR, str(write_fd)],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    pass_fds=(write_fd,)
+                )
+            finally:
+                # Only the worker may hold the write end, so EOF means it exited
+                os.close(write_fd)
+        except Exception as e:
+            os.close(read_fd)
+            error = f"Validation worker error: {e}"
+        else:
+            # Drain the result pipe on a thread so a large result cannot
+            # block the worker before it exits
+            with os.fdopen(read_fd, "rb") as result_pipe:
+                reader = _TEST_POOL.submit(result_pipe.read)
+                try:
+                    process.communicate(
+                        pickle.dumps((code, list(tests), collect_details)),
+                        timeout=VALIDATION_TIMEOUT
+                    )
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                    error = f"Validation timed out after {VALIDATION_TIMEOUT}s (infinite loop or too slow?)"
+                else:
+                    payload = reader.result()
+                    if process.returncode == 0:
+                        return _parse_sandbox_result(payload, len(tests))
+                    error = (
+                        f"Validation worker exited with code {process.returncode} "
+                        "(exceeded CPU or memory limits?)"
+                    )
+                reader.result()
+    
+    return {
+        "success": False,
+        "error": error,
+        "passed_tests": 0,
+        "total_tests": len(tests),
+        "details": []
+    }
+
+
+def _runs_in_process(code: str) -> bool:
+    """Whether code is safe to validate without a sandbox (straight-line)."""
+    try:
+        return _compiled(code)[2]
+    except SyntaxError:
+        return True  # Nothing runs; _run_validation reports the error
+
+
+def validate_code(
+    code: str,
+    tests: List[Dict[str, Any]],
+    collect_details: bool = False
+) -> Dict[str, Any]:
+    """
+    Validate Python code by running test cases.
+    
+    Non-trivial validations run in a sandbox worker process with CPU,
+    memory and wall-clock limits; see _run_validation for the semantics.
+    
+    Args:
+        code: Python code to validate
+        tests: List of test cases with 'args' (or 'input') and 'expected' keys
+        collect_details: Run all tests and fill in per-test details
+        
+    Returns:
+        Dictionary with validation results
+    """
+    if (
+        len(code) <= INPROCESS_MAX_CODE_LENGTH
+        and len(tests) <= INPROCESS_MAX_TESTS
+        and _runs_in_process(code)
+    ):
+        return _run_validation(code, tests, collect_details)
+    
+    return _sandboxed_validation(code, tests, collect_details)
+
+
 def validate_logic(solution: str, rules: List[str]) -> Dict[str, Any]:
     """
     Validate solution against logical rules.
@@ -195,7 +625,7 @@ def reverse(s):
         {"input": "racecar", "expected": "racecar"}
     ]
     
-    result = validate_code(code, tests)
+    result = validate_code(code, tests, collect_details=True)
     print(f"Success: {result['success']}")
     print(f"Passed: {result['passed_tests']}/{result['total_tests']}")
     if not result['success']: